@@ -1,3 +1,6 @@
+import logging
+import math
+import os
 import random
 import string
 from functools import cached_property
@@ -5,6 +8,9 @@ from typing import Dict
 
 import cairo
 
+from components.deadline import Deadline
+from components.level_of_detail import LevelOfDetail
+from components.reflection import Reflection
 from components.shapes.arch import Arch
 from components.shapes.circle import Circle
 from components.shapes.eyebrow import Eyebrow
@@ -16,121 +22,365 @@ from components.shapes.tombstone import Tombstone
 from components.shapes.trapezoid import Trapezoid
 from components.shapes.triangle import Triangle
 from enums.colors import Colors
+from enums.quality_presets import QualityPresets
+from services.geometry_cache_service import GeometryCacheService
+from services.png_encoding_service import PngEncodingService
+from services.svg_canonicalization_service import SvgCanonicalizationService
+from services.tiled_rasterization_service import TiledRasterizationService
+
+logger = logging.getLogger(__name__)
 
 
 class Canvas:
     BORDER_LEFT_OFFSET, BORDER_RIGHT_OFFSET, BORDER_TOP_OFFSET, BORDER_BOTTOM_OFFSET = 10, 10, 10, 10
 
-    def __init__(self, raw_params: Dict):
+    SHAPES = {
+        'halfcircle': HalfCircle,
+        'circle': Circle,
+        'octagon': Octagon,
+        'eyebrow': Eyebrow,
+        'arc': Arch,
+        'tombstone': Tombstone,
+        'triangle': Triangle,
+        'trapezoid': Trapezoid,
+        'quartercircle': QuarterCircle,
+    }
+
+    # bump whenever a change alters the rendered output, it invalidates ETags and cached artifacts
+    ENGINE_VERSION = 20
+
+    # png surfaces of the `raster_mode` option: black ink drawn as alpha needs a quarter or a 32nd of the memory
+    RASTER_FORMATS = {
+        'color': cairo.FORMAT_ARGB32,
+        'grayscale': cairo.FORMAT_A8,
+        'monochrome': cairo.FORMAT_A1,
+    }
+
+    # png renders of at least this many pixels are rasterized in strips by a pool of processes
+    TILED_MIN_PIXELS = 4096 * 4096
+    # panels and labels this close to a strip are still drawn into it, their strokes reach into it
+    VIEWPORT_MARGIN = 4
+
+    # fitting into max_canvas_width/max_canvas_height, see calculate_scale_factor
+    FIT_PASSES = 8
+    MIN_SCALE_FACTOR = 0.1
+    # a scale whose canvas still overflows the box is shrunk by this much until it fits
+    FIT_SHRINK_FACTOR = 0.9
+
+    def __init__(self, raw_params: Dict, deadline: Deadline = None, thumbnail_size: int = None, zoom: float = None):
+        """
+        :param thumbnail_size: renders a png thumbnail fitting a square of this many pixels instead,
+        without labels, simplified and with fast antialiasing
+        :param zoom: renders the png at this many pixels per user space unit, for the tiles of a zoom level
+        """
         self.filename = f"/tmp/{''.join(random.choice(string.ascii_uppercase) for _ in range(20))}.svg"
         self.raw_params = raw_params
-        self.scale_factor = self.calculate_scale_factor()
+        self.deadline = deadline or Deadline()
+        self.thumbnail_size = thumbnail_size
+        self.zoom = zoom
 
         self.context = None
         self.__surface = None
 
     def draw(self):
-        # set font size for shape label as 15 if image format is png
-        if self.image_format == 'png':
-            ShapeLabel.TEXT_SIZE = 15
+        if self.is_tiled:
+            self.filename = f"/tmp/{''.join(random.choice(string.ascii_uppercase) for _ in range(20))}.png"
+            TiledRasterizationService(self, self.filename).run()
+            return
 
         self.context = self.__create_context()
-        shape = self.raw_params.get('shape', None)
-        if not shape:
-            self.__draw_frame(self.context)
-        elif shape == 'halfcircle':
-            hc = HalfCircle(x=self.BORDER_LEFT_OFFSET + self.left_positioned_labels_width, y=self.BORDER_BOTTOM_OFFSET,
-                            raw_params=self.raw_params, scale_factor=self.scale_factor,
-                            draw_label=self.draw_label)
-            hc.set_context(self.context)
-            hc.draw_shape()
-        elif shape == 'circle':
-            c = Circle(x=self.BORDER_LEFT_OFFSET + self.left_positioned_labels_width, y=self.BORDER_BOTTOM_OFFSET,
-                       raw_params=self.raw_params, scale_factor=self.scale_factor, draw_label=self.draw_label)
-            c.set_context(self.context)
-            c.draw_shape()
-        elif shape == 'octagon':
-            c = Octagon(x=self.BORDER_LEFT_OFFSET + self.left_positioned_labels_width, y=self.BORDER_BOTTOM_OFFSET,
-                        raw_params=self.raw_params, scale_factor=self.scale_factor,
-                        draw_label=self.draw_label)
-            c.set_context(self.context)
-            c.draw_shape()
-        elif shape == 'eyebrow':
-            e = Eyebrow(x=self.BORDER_LEFT_OFFSET + self.left_positioned_labels_width, y=self.BORDER_BOTTOM_OFFSET,
-                        raw_params=self.raw_params, scale_factor=self.scale_factor,
-                        draw_label=self.draw_label)
-            e.set_context(self.context)
-            e.draw_shape()
-        elif shape == 'arc':
-            a = Arch(x=self.BORDER_LEFT_OFFSET + self.left_positioned_labels_width, y=self.BORDER_BOTTOM_OFFSET,
-                     raw_params=self.raw_params, scale_factor=self.scale_factor,
-                     draw_label=self.draw_label)
-            a.set_context(self.context)
-            a.draw_shape()
-        elif shape == 'tombstone':
-            t = Tombstone(x=self.BORDER_LEFT_OFFSET + self.left_positioned_labels_width, y=self.BORDER_BOTTOM_OFFSET,
-                          raw_params=self.raw_params, scale_factor=self.scale_factor,
-                          draw_label=self.draw_label)
-            t.set_context(self.context)
-            t.draw_shape()
-        elif shape == 'triangle':
-            triangle = Triangle(x=self.BORDER_LEFT_OFFSET + self.left_positioned_labels_width,
-                                y=self.BORDER_BOTTOM_OFFSET, raw_params=self.raw_params, scale_factor=self.scale_factor,
-                                draw_label=self.draw_label, direction=self.direction)
-            triangle.set_context(self.context)
-            triangle.draw_shape()
-
-        elif shape == 'trapezoid':
-            trapezoid = Trapezoid(x=self.BORDER_LEFT_OFFSET + self.left_positioned_labels_width,
-                                  y=self.BORDER_BOTTOM_OFFSET, raw_params=self.raw_params,
-                                  scale_factor=self.scale_factor, draw_label=self.draw_label, direction=self.direction)
-            trapezoid.set_context(self.context)
-            trapezoid.draw_shape()
-
-        elif shape == 'quartercircle':
-            quarter_circle = QuarterCircle(x=self.BORDER_LEFT_OFFSET + self.left_positioned_labels_width,
-                                           y=self.BORDER_BOTTOM_OFFSET, raw_params=self.raw_params,
-                                           scale_factor=self.scale_factor, draw_label=self.draw_label,
-                                           direction=self.direction)
-            quarter_circle.set_context(self.context)
-            quarter_circle.draw_shape()
+        try:
+            self.__draw_content(self.context)
+        except Exception:
+            # release the surface and drop the partially drawn file, e.g. when the deadline is exceeded
+            self.__close()
+            if os.path.exists(self.filename):
+                os.remove(self.filename)
+            raise
 
         if self.image_format == 'png':
             self.filename = f"/tmp/{''.join(random.choice(string.ascii_uppercase) for _ in range(20))}.png"
-            self.__surface.write_to_png(self.filename)
+            PngEncodingService(self.__surface, self.filename, self.quality.png_compression_level,
+                               is_transparent=self.is_transparent).run()
 
         self.__close()
 
-    # calculate total width with no scale factor
-    def calculate_total_width(self):
-        frame_width_with_labels = self.frame_width + self.left_positioned_labels_width
-        return frame_width_with_labels + self.BORDER_LEFT_OFFSET + self.BORDER_RIGHT_OFFSET
+        if self.image_format == 'svg':
+            SvgCanonicalizationService(self.filename).run()
+
+    def __draw_content(self, context, viewport=None):
+        if not self.is_shape:
+            self.__draw_frame(context, viewport)
+        elif self.shape:
+            self.__draw_shape(context)
+
+    @cached_property
+    def is_tiled(self):
+        """
+        Huge pngs are rasterized in strips, except transparent color ones: cairo's writer has to unpremultiply them,
+        and only by a server that started the pool of TiledRasterizationService
+        """
+        if self.image_format != 'png' or self.thumbnail_size or self.zoom or not TiledRasterizationService.is_available():
+            return False
+        if self.raster_mode == 'color' and self.is_transparent:
+            return False
+
+        width, height = self.pixel_size
+        return width * height >= self.TILED_MIN_PIXELS
+
+    @cached_property
+    def pixel_size(self):
+        """(width, height) of the png"""
+        return (max(1, math.ceil(self.canvas_width * self.pixel_scale)),
+                max(1, math.ceil(self.canvas_height * self.pixel_scale)))
+
+    @cached_property
+    def raster_format(self):
+        return self.RASTER_FORMATS[self.raster_mode]
+
+    def prepare_drawing(self):
+        """Computes everything drawing reads, so strips can be drawn by forked processes without laying out again"""
+        for attribute in ['pixel_size', 'tree_origin', 'level_of_detail', 'reflection', 'draws_shape_labels',
+                          'quality']:
+            getattr(self, attribute)
+
+    def rasterize(self, x, y, width, height) -> cairo.ImageSurface:
+        """
+        Rasterizes the pixels [x, x + width) x [y, y + height) of the png, e.g. a strip or a tile,
+        panels and labels outside of them are culled
+        """
+        surface = cairo.ImageSurface(self.raster_format, width, height)
+
+        self.__draw_content(self.__create_context(surface, offset=(x, y)), self.viewport(x, y, width, height))
+        surface.flush()
+
+        return surface
+
+    def viewport(self, x, y, width, height):
+        """
+        Box of the laid out tree covering the pixels [x, x + width) x [y, y + height) of the png,
+        widened by VIEWPORT_MARGIN
+        """
+        min_x, min_y = self.tree_point(x, y + height)
+        max_x, max_y = self.tree_point(x + width, y)
+
+        return (min_x - self.VIEWPORT_MARGIN, min_y - self.VIEWPORT_MARGIN,
+                max_x + self.VIEWPORT_MARGIN, max_y + self.VIEWPORT_MARGIN)
+
+    def tree_point(self, x, y):
+        """Point of the laid out tree at the pixel position (x, y) of the png, or the user space one of the svg"""
+        origin_x, origin_y = self.tree_origin
+
+        # the canvas is y-up
+        return x / self.pixel_scale - origin_x, self.canvas_height - y / self.pixel_scale - origin_y
+
+    def image_point(self, x, y):
+        """Pixel position on the png, or user space point of the svg, of the point (x, y) of the laid out tree"""
+        origin_x, origin_y = self.tree_origin
+
+        return (x + origin_x) * self.pixel_scale, (self.canvas_height - y - origin_y) * self.pixel_scale
+
+    def zoomed(self, zoom: float) -> 'Canvas':
+        """
+        Canvas of the spec at another zoom, with the scale this one has fitted: the layout is the same.
+        It keeps this canvas' label bands, even where its labels are too small to be drawn,
+        so every zoom level is this canvas scaled and the tiles of the levels line up
+        """
+        canvas = Canvas(self.raw_params, deadline=self.deadline, zoom=zoom)
+        canvas.scale_factor = self.scale_factor
+        canvas.labels_bounding_box = self.labels_bounding_box
+
+        return canvas
+
+    @cached_property
+    def spatial_index(self):
+        """Index of the frames, panels, DLOs and labels as drawn on this canvas, None for unknown shapes"""
+        layout = self.layout_at(self.scale_factor)
+        if layout is None:
+            return None
+        elif self.is_shape:
+            label_text_size = self.shape_label_text_size if self.draws_shape_labels else None
+            return layout.spatial_index(label_text_size, self.reflection)
+
+        return layout.spatial_index(self.reflection)
+
+    def hit_test(self, x, y):
+        """
+        Elements drawn at the pixel position (x, y) of the png, or the user space one of the svg,
+        the topmost first: labels, then the innermost panels
+        """
+        if self.spatial_index is None:
+            return []
+
+        # labels of frames are only hit where they are drawn
+        kinds = None if self.is_shape or self.draws_frame_labels else ['frame', 'panel', 'dlo']
+
+        return self.spatial_index.hit_test(*self.tree_point(x, y), kinds=kinds)
+
+    @cached_property
+    def draws_frame_labels(self):
+        from components.size_label import SizeLabel
+
+        return self.draw_label and self.level_of_detail.draws_labels(SizeLabel.TEXT_SIZE)
+
+    @cached_property
+    def tree_origin(self):
+        """Where the tree or the shape, laid out at the origin, is drawn: next to the label bands of this canvas"""
+        return (self.BORDER_LEFT_OFFSET + self.left_positioned_labels_width,
+                self.BORDER_BOTTOM_OFFSET + self.bottom_positioned_labels_height)
 
     def calculate_scale_factor(self):
-        max_canvas_width = self.max_canvas_width
-        if max_canvas_width:
-            total_width = self.calculate_total_width()
-            return max_canvas_width / total_width
-        return self.raw_params.get('scale_factor', 5)
+        """
+        The spec's scale_factor, or the largest one fitting the canvas into max_canvas_width/max_canvas_height.
+
+        Only the frame scales, the label bands and the borders are in pixels: the bands are measured
+        on the layout at one scale and the box is solved for the frame. Label texts overhang spans
+        of another length by another amount, so it is solved again with the bands at the solved scale,
+        until it settles on a scale that fits. If it doesn't within FIT_PASSES, the largest scale tried that fits
+        is taken, or the smallest one tried is shrunk until it fits, down to MIN_SCALE_FACTOR.
+        Trial layouts are not cached, only the one at the chosen scale is
+        """
+        scale_factor = self.raw_params.get('scale_factor') or 5
+        if not self.max_canvas_width and not self.max_canvas_height:
+            return scale_factor
+
+        trials = {}
+        for _ in range(self.FIT_PASSES):
+            trials[scale_factor] = self.__trial(scale_factor)
+            content_box = trials[scale_factor][1]
+
+            fitted_scale_factor = self.__fit_scale_factor(scale_factor, content_box)
+            if self.__fits(content_box) and math.isclose(fitted_scale_factor, scale_factor, rel_tol=1e-4):
+                break
+
+            scale_factor = fitted_scale_factor
+        else:
+            fitting_scale_factors = [_ for _ in trials if self.__fits(trials[_][1])]
+            if fitting_scale_factors:
+                scale_factor = max(fitting_scale_factors)
+            else:
+                scale_factor = self.__shrink_to_fit(min(trials), trials)
+
+        layout = trials[scale_factor][0]
+        if layout is not None:
+            GeometryCacheService(self.raw_params, scale_factor=scale_factor).put(layout)
+            if not self.is_shape:
+                layout.cache_subtrees()
+
+        return scale_factor
+
+    def __trial(self, scale_factor):
+        """Layout at the scale, without caching it, and the bounding box of what is drawn of it"""
+        layout = self.layout_at(scale_factor, cache=False)
+
+        return layout, self.calculate_content_box(layout, scale_factor)
+
+    def __fit_scale_factor(self, scale_factor, content_box):
+        """Scale fitting the canvas into the box with the label bands of the layout at the given scale"""
+        bands_width = content_box[2] - content_box[0] - self.frame_width * scale_factor
+        bands_height = content_box[3] - content_box[1] - self.overall_frame_height * scale_factor
+
+        fitted_scale_factors = []
+        if self.max_canvas_width:
+            free_width = self.max_canvas_width - bands_width - self.BORDER_LEFT_OFFSET - self.BORDER_RIGHT_OFFSET
+            fitted_scale_factors.append(free_width / self.frame_width)
+        if self.max_canvas_height:
+            free_height = self.max_canvas_height - bands_height - self.BORDER_TOP_OFFSET - self.BORDER_BOTTOM_OFFSET
+            fitted_scale_factors.append(free_height / self.overall_frame_height)
+
+        # a box too small for the label bands gets a tiny frame rather than none
+        return max(min(fitted_scale_factors), self.MIN_SCALE_FACTOR)
+
+    def __fits(self, content_box):
+        """Whether the canvas around the content box fits into max_canvas_width/max_canvas_height"""
+        width = content_box[2] - content_box[0] + self.BORDER_LEFT_OFFSET + self.BORDER_RIGHT_OFFSET
+        height = content_box[3] - content_box[1] + self.BORDER_TOP_OFFSET + self.BORDER_BOTTOM_OFFSET
+
+        return ((not self.max_canvas_width or width <= self.max_canvas_width + 1e-6) and
+                (not self.max_canvas_height or height <= self.max_canvas_height + 1e-6))
+
+    def __shrink_to_fit(self, scale_factor, trials):
+        while scale_factor > self.MIN_SCALE_FACTOR:
+            scale_factor = max(scale_factor * self.FIT_SHRINK_FACTOR, self.MIN_SCALE_FACTOR)
+            trials[scale_factor] = self.__trial(scale_factor)
+            if self.__fits(trials[scale_factor][1]):
+                return scale_factor
+
+        if not self.__fits(trials[scale_factor][1]):
+            logger.warning("Canvas exceeds %sx%s even at the minimum scale %s",
+                           self.max_canvas_width, self.max_canvas_height, scale_factor)
+
+        return scale_factor
+
+    @cached_property
+    def scale_factor(self):
+        return self.calculate_scale_factor()
 
     @cached_property
     def max_canvas_width(self):
         return self.raw_params.get('max_canvas_width')
 
+    @cached_property
+    def max_canvas_height(self):
+        return self.raw_params.get('max_canvas_height')
+
     @cached_property
     def draw_label(self):
-        return self.raw_params.get('draw_label', True)
+        return self.raw_params.get('draw_label', True) and not self.thumbnail_size
 
     @cached_property
     def is_transparent(self):
         return self.raw_params.get('is_transparent', False)
 
+    @cached_property
+    def raster_mode(self):
+        """color, grayscale or monochrome, svgs are always drawn in color"""
+        raster_mode = self.raw_params.get('raster_mode', 'color')
+        if self.image_format != 'png' or raster_mode not in self.RASTER_FORMATS:
+            return 'color'
+
+        return raster_mode
+
+    @cached_property
+    def quality(self):
+        return QualityPresets.get(self.raw_params.get('quality'))
+
+    @cached_property
+    def level_of_detail(self):
+        return LevelOfDetail.from_raw_params(self.raw_params, pixel_scale=self.pixel_scale, default=self.quality.lod)
+
+    @cached_property
+    def pixel_scale(self):
+        """Output pixels per user space unit, thumbnails scale the whole canvas down to fit their box"""
+        if self.zoom:
+            return self.zoom
+        elif not self.thumbnail_size:
+            return 1.0
+
+        return min(1.0, self.thumbnail_size / max(self.canvas_width, self.canvas_height))
+
+    @cached_property
+    def draws_shape_labels(self):
+        return self.draw_label and self.level_of_detail.draws_labels(self.shape_label_text_size)
+
+    @cached_property
+    def is_shape(self):
+        return bool(self.raw_params.get('shape'))
+
+    @cached_property
+    def shape_label_text_size(self):
+        # png labels are rasterized, so they get a bigger font to stay readable
+        return ShapeLabel.PNG_TEXT_SIZE if self.image_format == 'png' else ShapeLabel.TEXT_SIZE
+
     @cached_property
     def direction(self):
         return self.raw_params.get('direction', "left")
 
     @cached_property
     def image_format(self):
+        if self.thumbnail_size or self.zoom:
+            return 'png'
+
         return self.raw_params.get('image_format', "svg")
 
     @cached_property
@@ -158,55 +408,76 @@ class Canvas:
         return self.raw_params.get('height_2', 0)
 
     @cached_property
-    def left_positioned_labels_width(self):
-        # return 0 if draw_label is false
-        if not self.draw_label:
-            return 0
+    def overall_frame_height(self):
+        """Height of the rectangle around the frame, shapes may have a taller second side"""
+        return max(self.frame_height, self.frame_height_2)
 
-        from components.size_label import SizeLabel
-        from components.panel import Panel
+    @cached_property
+    def labels_bounding_box(self):
+        """
+        Bounding box of the frame and its placed size labels, in the coordinates of the laid out tree.
+        For shapes the exact extent of the planned shape as drawn
+        """
+        return self.calculate_content_box(self.layout_at(self.scale_factor), self.scale_factor)
 
-        if self.child_frames:
-            num_of_child_labels = max([_['coordinates']['x'] for _ in self.child_frames]) * Panel.LABELS_PER_FRAME
-        elif self.child_panels:
-            if self.orientation == 'horizontal':
-                num_of_child_labels = len(self.child_panels) * Panel.LABELS_PER_PANEL
-            else:
-                num_of_child_labels = Panel.LABELS_PER_PANEL
-        else:
-            num_of_child_labels = Panel.LABELS_PER_PANEL
+    def calculate_content_box(self, layout, scale_factor):
+        """
+        Bounding box of what is drawn of a layout, the frame is laid out at the origin
+        :param layout: laid out panel tree or planned shape, see layout_at
+        """
+        if layout is None:
+            return 0, 0, self.frame_width * scale_factor, self.overall_frame_height * scale_factor
 
-        total_number_of_labels = num_of_child_labels + Panel.LABELS_PER_FRAME
+        reflection = self.calculate_reflection(layout)
 
-        total_length_of_labels = total_number_of_labels * SizeLabel.LABEL_SIDE_LENGTH
-        length_of_first_text = SizeLabel.TEXT_SIZE
+        if self.is_shape:
+            return layout.bounding_box(self.draws_shape_labels, self.shape_label_text_size, reflection)
 
-        return SizeLabel.LABEL_OFFSET + length_of_first_text + total_length_of_labels
+        boxes = [(layout.x, layout.y, layout.x + layout.scaled_width, layout.y + layout.scaled_height)]
+        # no band is reserved for labels too small to be drawn, e.g. in draft renders
+        if self.draws_frame_labels:
+            boxes += [Reflection.move_box(_.bounding_box, _.reflection_offset(reflection)) for _ in layout.size_labels]
+
+        return (min([_[0] for _ in boxes]), min([_[1] for _ in boxes]),
+                max([_[2] for _ in boxes]), max([_[3] for _ in boxes]))
 
     @cached_property
-    def top_positioned_labels_height(self):
-        # return 0 if draw_label is false
-        if not self.draw_label:
-            return 0
-        from components.panel import Panel
-        from components.size_label import SizeLabel
+    def reflection(self):
+        return self.calculate_reflection(self.layout_at(self.scale_factor))
 
-        if self.child_frames:
-            num_of_child_labels = max([_['coordinates']['y'] for _ in self.child_frames]) * Panel.LABELS_PER_FRAME
-        elif self.child_panels:
-            if self.orientation == 'horizontal':
-                num_of_child_labels = Panel.LABELS_PER_PANEL
-            else:
-                num_of_child_labels = len(self.child_panels) * Panel.LABELS_PER_PANEL
-        else:
-            num_of_child_labels = Panel.LABELS_PER_PANEL
+    def calculate_reflection(self, layout):
+        """
+        Mirrors the drawing for the interior elevation and for the right pointing variant of directed shapes,
+        which share the layout of the exterior, left pointing one. None if it is drawn as laid out
+        """
+        if layout is None:
+            return None
+
+        if self.is_shape:
+            outline_box = layout.outline_box
+            return Reflection.from_raw_params(self.raw_params, axis_x=(outline_box[0] + outline_box[2]) / 2,
+                                              mirrored=layout.mirrors(self.direction))
+
+        return Reflection.from_raw_params(self.raw_params, axis_x=layout.x + layout.scaled_width / 2)
+
+    # the frame is laid out at the origin, the label bands are what is drawn around it
+    @cached_property
+    def left_positioned_labels_width(self):
+        return -self.labels_bounding_box[0]
 
-        total_number_of_labels = num_of_child_labels + Panel.LABELS_PER_FRAME
+    @cached_property
+    def right_positioned_labels_width(self):
+        """Width of the label texts running past the right edge of the frame"""
+        return self.labels_bounding_box[2] - self.scaled_frame_width
 
-        total_length_of_labels = total_number_of_labels * SizeLabel.LABEL_SIDE_LENGTH
-        length_of_first_text = SizeLabel.TEXT_SIZE
+    @cached_property
+    def top_positioned_labels_height(self):
+        return self.labels_bounding_box[3] - self.scaled_frame_height
 
-        return SizeLabel.LABEL_OFFSET + length_of_first_text + total_length_of_labels
+    @cached_property
+    def bottom_positioned_labels_height(self):
+        """Labels never run below a frame, a shape's outline may"""
+        return -self.labels_bounding_box[1]
 
     @cached_property
     def scaled_frame_width(self):
@@ -214,15 +485,15 @@ class Canvas:
 
     @cached_property
     def scaled_frame_height(self):
-        return max(self.frame_height, self.frame_height_2) * self.scale_factor
+        return self.overall_frame_height * self.scale_factor
 
     @cached_property
     def scaled_framed_width_with_labels(self):
-        return self.scaled_frame_width + self.left_positioned_labels_width
+        return self.scaled_frame_width + self.left_positioned_labels_width + self.right_positioned_labels_width
 
     @cached_property
     def scaled_framed_height_with_labels(self):
-        return self.scaled_frame_height + self.top_positioned_labels_height
+        return self.scaled_frame_height + self.top_positioned_labels_height + self.bottom_positioned_labels_height
 
     @cached_property
     def canvas_width(self):
@@ -241,37 +512,98 @@ class Canvas:
         else:
             return 'horizontal'
 
-    def __create_context(self):
+    def __create_context(self, surface=None, offset=(0, 0)):
         """
         Creates a context to draw onto
+        :param surface: surface of a part of the png, the canvas' own surface is created if None
+        :param offset: first column and row of the part
         :return: context
         """
-        self.__surface = cairo.SVGSurface(self.filename, self.canvas_width, self.canvas_height)
-
-        context = cairo.Context(self.__surface)
-        if self.is_transparent:
-            context.set_source_rgba(0, 0, 0, 0)
-        else:
-            context.set_source_rgba(*Colors.WHITE)
-        context.paint()
+        if surface is None:
+            if self.image_format == 'png':
+                # rasterized straight away, there is no svg to keep
+                self.__surface = cairo.ImageSurface(self.raster_format, *self.pixel_size)
+            else:
+                self.__surface = cairo.SVGSurface(self.filename, self.canvas_width, self.canvas_height)
+            surface = self.__surface
+
+        context = cairo.Context(surface)
+        if offset != (0, 0):
+            context.translate(-offset[0], -offset[1])
+        self.quality.apply(context)
+        if self.thumbnail_size:
+            context.set_antialias(cairo.ANTIALIAS_FAST)
+        if self.thumbnail_size or self.zoom:
+            context.scale(self.pixel_scale, self.pixel_scale)
+
+        # alpha only surfaces hold the ink, no coverage is the white paper or the transparent background
+        if self.raster_mode == 'color':
+            if self.is_transparent:
+                context.set_source_rgba(0, 0, 0, 0)
+            else:
+                context.set_source_rgba(*Colors.WHITE)
+            context.paint()
 
         matrix = cairo.Matrix(yy=-1, y0=self.canvas_height)
         context.transform(matrix)
 
         return context
 
-    def __draw_frame(self, context):
+    @cached_property
+    def root_panel(self):
+        return self.layout_at(self.scale_factor)
+
+    @cached_property
+    def shape(self):
+        """Planned shaped unit, None for unknown shapes"""
+        return self.layout_at(self.scale_factor)
+
+    def layout_at(self, scale_factor, cache: bool = True):
+        """
+        Laid out panel tree, or planned shape of a shaped unit, at the scale.
+        Shared with every other render of the same geometry at the same scale
+        :param cache: false to not keep a new layout, e.g. for the trial scales of calculate_scale_factor
+        :return: None for unknown shapes
+        """
         from components.panel import Panel
 
-        initial_frame = Panel(
-            x=self.BORDER_LEFT_OFFSET + self.left_positioned_labels_width,
-            y=self.BORDER_BOTTOM_OFFSET,
-            parent_panel=None,
-            raw_params=self.raw_params,
-            scale_factor=self.raw_params.get('scale_factor') or 5
-        ).set_context(context)
+        shape_class = self.SHAPES.get(self.raw_params['shape']) if self.is_shape else None
+        if self.is_shape and not shape_class:
+            return None
+
+        service = GeometryCacheService(self.raw_params, scale_factor=scale_factor)
+
+        layout = service.get()
+        if layout is None:
+            if shape_class:
+                layout = shape_class(raw_params=self.raw_params, scale_factor=scale_factor).plan(self.deadline)
+            else:
+                layout = Panel(parent_panel=None, raw_params=self.raw_params,
+                               scale_factor=scale_factor).layout(self.deadline, cache)
+            if cache:
+                service.put(layout)
+
+        return layout
+
+    def __draw_shape(self, context):
+        context.save()
+
+        # shapes are planned at the origin
+        context.translate(*self.tree_origin)
+        self.shape.draw(context, self.deadline, self.level_of_detail, draw_label=self.draws_shape_labels,
+                        label_text_size=self.shape_label_text_size, reflection=self.reflection)
+
+        context.restore()
+
+    def __draw_frame(self, context, viewport=None):
+        context.save()
+
+        # the tree is laid out at the origin
+        context.translate(*self.tree_origin)
+        self.root_panel.draw(context, self.deadline, self.level_of_detail, draw_labels=self.draw_label,
+                             reflection=self.reflection, viewport=viewport)
 
-        initial_frame.draw()
+        context.restore()
 
     def __close(self):
         self.__surface.__exit__()
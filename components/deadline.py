@@ -0,0 +1,29 @@
+import time
+
+
+class DeadlineExceeded(Exception):
+    """Raised from the drawing loops once the time budget of a render is spent"""
+
+
+class Deadline:
+    """
+    Time budget of a render request, checked cooperatively inside the drawing loops
+    """
+
+    def __init__(self, budget: float = None):
+        """
+        :param budget: time budget in seconds, the render is not limited if None
+        """
+        self.expires_at = time.monotonic() + budget if budget is not None else None
+
+    @property
+    def remaining(self):
+        """Remaining seconds of the budget or None if the render is not limited"""
+        if self.expires_at is None:
+            return None
+
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def check(self):
+        if self.expires_at is not None and time.monotonic() > self.expires_at:
+            raise DeadlineExceeded
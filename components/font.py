@@ -0,0 +1,120 @@
+import threading
+from collections import OrderedDict
+from typing import List
+
+import cairo
+
+
+class Font:
+    """
+    The toy font labels are drawn with, scaled to one size.
+    Created once per process and size, shared by all renders.
+
+    Keeps a table of glyph advances so label texts are measured with table lookups
+    instead of a cairo text_extents round trip per label. The toy API does not kern,
+    so the width of a string is exactly the sum of its advances.
+
+    Texts are drawn as glyph runs with `show_glyphs`: the face is resolved once and
+    the glyphs of a string, laid out from the origin, are cached, so drawing a label
+    neither looks the font up nor converts the string again.
+    """
+    # cairo's default face, the one `show_text` uses when no face is selected
+    FAMILY = ''
+
+    # advances of printable ascii are measured upfront, anything else on first use
+    PRELOADED_CHARACTERS = [chr(_) for _ in range(32, 127)]
+
+    MAX_GLYPH_RUNS = 4096
+
+    _lock = threading.Lock()
+    _fonts = {}
+
+    def __init__(self, size: float):
+        self.size = size
+        self.font_face = cairo.ToyFontFace(self.FAMILY)
+        self.scaled_font = cairo.ScaledFont(
+            self.font_face,
+            cairo.Matrix(xx=size, yy=size),
+            cairo.Matrix(),
+            cairo.FontOptions()
+        )
+
+        ascent, descent = self.scaled_font.extents()[:2]
+        self.ascent = ascent
+        self.descent = descent
+
+        self.advances = {_: self.scaled_font.text_extents(_).x_advance for _ in self.PRELOADED_CHARACTERS}
+        self.glyph_indices = {_: self.__glyph_index(_) for _ in self.PRELOADED_CHARACTERS}
+        self.glyph_runs = OrderedDict()
+
+    @classmethod
+    def get(cls, size: float) -> 'Font':
+        with cls._lock:
+            font = cls._fonts.get(size)
+            if font is None:
+                font = cls._fonts[size] = cls(size)
+
+            return font
+
+    @classmethod
+    def clear(cls):
+        """Drops the fonts and their glyph runs, e.g. to measure cold renders"""
+        with cls._lock:
+            cls._fonts.clear()
+
+    def advance(self, character: str) -> float:
+        advance = self.advances.get(character)
+        if advance is None:
+            # scaled fonts are shared between threads, cairo calls on them are serialized
+            with self._lock:
+                advance = self.advances[character] = self.scaled_font.text_extents(character).x_advance
+
+        return advance
+
+    def text_width(self, text: str) -> float:
+        return sum([self.advance(_) for _ in text])
+
+    def glyph_index(self, character: str) -> int:
+        index = self.glyph_indices.get(character)
+        if index is None:
+            with self._lock:
+                index = self.glyph_indices[character] = self.__glyph_index(character)
+
+        return index
+
+    def glyphs(self, text: str) -> List[cairo.Glyph]:
+        """Glyph run of the text with its baseline starting at the origin"""
+        with self._lock:
+            glyphs = self.glyph_runs.get(text)
+            if glyphs is not None:
+                self.glyph_runs.move_to_end(text)
+                return glyphs
+
+        glyphs, x = [], 0
+        for character in text:
+            glyphs.append(cairo.Glyph(self.glyph_index(character), x, 0))
+            x += self.advance(character)
+
+        with self._lock:
+            self.glyph_runs[text] = glyphs
+            while len(self.glyph_runs) > self.MAX_GLYPH_RUNS:
+                self.glyph_runs.popitem(last=False)
+
+        return glyphs
+
+    def show(self, context: cairo.Context, text: str):
+        """
+        Draws the text with its baseline starting at the origin of the user space.
+        The canvas' user space is y-up, so the font matrix flips the glyphs back upright
+        """
+        context.set_font_face(self.font_face)
+        context.set_font_matrix(cairo.Matrix(xx=self.size, yy=-self.size))
+        context.show_glyphs(self.glyphs(text))
+
+    def __glyph_index(self, character: str) -> int:
+        glyphs = self.scaled_font.text_to_glyphs(0, 0, character, False)
+        if not glyphs:
+            # e.g. an empty string, drawn as the missing glyph
+            return 0
+
+        return glyphs[0].index
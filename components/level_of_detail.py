@@ -0,0 +1,77 @@
+from typing import Dict, Union
+
+
+class LevelOfDetail:
+    """
+    Decides which details are too small to be seen in the output and are skipped while drawing:
+    DLO outlines hugging their panel, move direction arrows, muntins, labels and the insides of tiny panels.
+
+    Sizes are compared in output pixels, user space units times `pixel_scale`
+    (the canvas draws one unit per pixel, scaled down renders pass their scale).
+
+    Configured per request with the `lod` option of a spec:
+        "lod": false                       draw every detail
+        "lod": true                        skip details with the default thresholds
+        "lod": {"min_detail_size": 2, ...} override thresholds, in pixels
+    Without it the spec's quality preset decides, see QualityPresets. By default details are only skipped
+    in scaled down renders (thumbnails, zoomed out tiles): svgs get zoomed by their viewers, so nothing
+    drawn one unit per pixel is too small to be seen.
+    """
+    MIN_DETAIL_SIZE = 1
+    MIN_ARROW_LENGTH = 3
+    MIN_MUNTIN_PANEL_SIZE = 12
+    MIN_TEXT_SIZE = 5
+
+    def __init__(self, min_detail_size: float = MIN_DETAIL_SIZE, min_arrow_length: float = MIN_ARROW_LENGTH,
+                 min_muntin_panel_size: float = MIN_MUNTIN_PANEL_SIZE, min_text_size: float = MIN_TEXT_SIZE,
+                 pixel_scale: float = 1.0, enabled: bool = True):
+        self.min_detail_size = min_detail_size
+        self.min_arrow_length = min_arrow_length
+        self.min_muntin_panel_size = min_muntin_panel_size
+        self.min_text_size = min_text_size
+        self.pixel_scale = pixel_scale
+        self.enabled = enabled
+
+    @classmethod
+    def from_raw_params(cls, raw_params: Dict, pixel_scale: float = 1.0,
+                        default: Union[Dict, bool, None] = None) -> 'LevelOfDetail':
+        """
+        :param default: options if the spec has none, e.g. the ones of its quality preset,
+                        None to skip details in scaled down renders only
+        """
+        options = raw_params.get('lod', default)
+        if options is None:
+            options = pixel_scale < 1
+
+        if options is False:
+            return cls(pixel_scale=pixel_scale, enabled=False)
+
+        thresholds = ['min_detail_size', 'min_arrow_length', 'min_muntin_panel_size', 'min_text_size']
+        options = options if isinstance(options, dict) else {}
+
+        return cls(pixel_scale=pixel_scale, **{k: float(v) for k, v in options.items() if k in thresholds})
+
+    @property
+    def key(self) -> str:
+        """Identifies the policy in caches of drawn fragments"""
+        if not self.enabled:
+            return 'full'
+
+        return (f"{self.min_detail_size}/{self.min_arrow_length}/{self.min_muntin_panel_size}/"
+                f"{self.min_text_size}@{self.pixel_scale}")
+
+    def draws_detail(self, size: float) -> bool:
+        """e.g. the gap between a panel and its DLO, or the inside of a panel"""
+        return self.__is_visible(size, self.min_detail_size)
+
+    def draws_arrow(self, length: float) -> bool:
+        return self.__is_visible(length, self.min_arrow_length)
+
+    def draws_muntins(self, width: float, height: float) -> bool:
+        return self.__is_visible(min(width, height), self.min_muntin_panel_size)
+
+    def draws_labels(self, text_size: float) -> bool:
+        return self.__is_visible(text_size, self.min_text_size)
+
+    def __is_visible(self, size: float, threshold: float) -> bool:
+        return not self.enabled or size * self.pixel_scale >= threshold
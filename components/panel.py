@@ -1,20 +1,28 @@
 import itertools
 from copy import deepcopy
+from functools import cached_property
 from typing import List
 
 import cairo
 import math
 
+from components.deadline import Deadline
+from components.level_of_detail import LevelOfDetail
+from components.reflection import Reflection
+from components.spatial_index import SpatialIndex
 from enums.colors import Colors
+from services.spec_hash_service import SpecHashService
+from services.subtree_cache_service import SubtreeCacheService
 
 
 class Panel:
     LABELS_PER_FRAME = 1
     LABELS_PER_PANEL = 2
 
-    def __init__(self, x=0.0, y=0.0, parent_panel=None, raw_params=None, scale_factor=5):
-        self._context = None
+    # a subtree's own name and grid position only matter to its parent
+    SUBTREE_EXCLUDED_KEYS = ('name', 'coordinates')
 
+    def __init__(self, x=0.0, y=0.0, parent_panel=None, raw_params=None, scale_factor=5):
         self.x = x
         self.y = y
         self.parent_panel = parent_panel
@@ -27,6 +35,7 @@ class Panel:
 
         self.child_panels = []
         self._size_labels = []
+        self._spatial_indexes = {}
 
     @property
     def width(self):
@@ -60,6 +69,30 @@ class Panel:
     def scaled_dlo_height(self):
         return self.dlo_height * self.scale_factor
 
+    @property
+    def collapse_labels(self):
+        return self.raw_params.get('collapse_labels', False)
+
+    @cached_property
+    def subtree_key(self):
+        """Identical for every panel whose subtree lays out and draws the same in its own coordinates"""
+        spec_hash = SpecHashService(self.raw_params, excluded_keys=self.SUBTREE_EXCLUDED_KEYS).run()
+
+        return f"{spec_hash}/{self.scale_factor}"
+
+    @property
+    def is_shared(self):
+        """
+        Non root panels with children are hash-consed, the root's children included: their size labels are placed
+        and drawn by the root, apart from the shared subtree. Leaves are cheaper to draw than to replay
+        """
+        return bool(self.parent_panel and (self.raw_child_panels or self.raw_child_frames))
+
+    @property
+    def subtree_size(self):
+        """Number of panels of the laid out subtree, the panel included"""
+        return 1 + sum([_.subtree_size for _ in self.child_panels])
+
     @property
     def raw_child_panels(self):
         return self.raw_params.get('panels') or []
@@ -112,43 +145,42 @@ class Panel:
             raw_child_panels=self.raw_child_panels
         )
 
-    def _draw_frame(self):
-        self.context.save()
+    def _draw_frame(self, context):
+        context.save()
 
-        self.context.set_source_rgba(*Colors.BLACK)
-        self.context.set_line_width(2)
-        self.context.rectangle(self.x, self.y, self.scaled_width, self.scaled_height)
-        self.context.stroke()
+        context.set_source_rgba(*Colors.BLACK)
+        context.set_line_width(2)
+        context.rectangle(0, 0, self.scaled_width, self.scaled_height)
+        context.stroke()
 
-        self.context.restore()
+        context.restore()
 
-    def _draw_panel(self):
-        self.context.save()
+    def _draw_panel(self, context):
+        context.save()
 
-        self.context.set_source_rgba(*Colors.BLACK)
-        self.context.set_line_width(1)
+        context.set_source_rgba(*Colors.BLACK)
+        context.set_line_width(1)
 
-        self.context.rectangle(self.x, self.y, self.scaled_width, self.scaled_height)
+        context.rectangle(0, 0, self.scaled_width, self.scaled_height)
 
-        self.context.stroke()
+        context.stroke()
 
-        self.context.restore()
+        context.restore()
 
-    def _draw_panel_dlo(self):
-        self.context.save()
+    def _draw_panel_dlo(self, context):
+        context.save()
 
         dlo_x_offset = (self.scaled_width - self.scaled_dlo_width) / 2
         dlo_y_offset = (self.scaled_height - self.scaled_dlo_height) / 2
 
-        self.context.set_source_rgba(*Colors.BLACK)
-        self.context.set_line_width(0.5)
-        self.context.rectangle(self.x + dlo_x_offset, self.y + dlo_y_offset, self.scaled_dlo_width,
-                               self.scaled_dlo_height)
-        self.context.stroke()
+        context.set_source_rgba(*Colors.BLACK)
+        context.set_line_width(0.5)
+        context.rectangle(dlo_x_offset, dlo_y_offset, self.scaled_dlo_width, self.scaled_dlo_height)
+        context.stroke()
 
-        self.context.restore()
+        context.restore()
 
-    def _draw_child_frames(self):
+    def _layout_child_frames(self, deadline: Deadline, cache: bool):
         sort_by = lambda _: f"{_['coordinates']['y']}_{_['coordinates']['x']}"
         group_by = lambda _: _['coordinates']['y']
 
@@ -158,26 +190,29 @@ class Panel:
         initial_x_offset = (self.scaled_width - self.scaled_dlo_width) / 2
         initial_y_offset = (self.scaled_height - self.scaled_dlo_height) / 2
 
-        y1 = self.y + initial_y_offset
+        y1 = initial_y_offset
         for row, _frames in row__w__frames.items():
-            x1 = self.x + initial_x_offset
+            x1 = initial_x_offset
 
             normalized_raw_frames = [self.get_normalized_child_frame(raw_frame=_) for _ in _frames]
 
             for raw_frame in normalized_raw_frames:
+                deadline.check()
+
                 frame = Panel(
                     x=x1,
                     y=y1,
                     parent_panel=self,
-                    raw_params=raw_frame
-                ).set_context(self.context).draw()
+                    raw_params=raw_frame,
+                    scale_factor=self.scale_factor
+                ).layout(deadline, cache)
                 self.child_panels.append(frame)
 
                 x1 += frame.scaled_width
 
             y1 += max([_['height'] * self.scale_factor for _ in _frames])
 
-    def _draw_child_panels(self):
+    def _layout_child_panels(self, deadline: Deadline, cache: bool):
         normalized_raw_child_panels = [self.get_normalized_child_panel(raw_panel=_) for _ in self.raw_child_panels]
 
         scaled_total_normalized_child_width = sum([_['width'] * self.scale_factor for _ in normalized_raw_child_panels])
@@ -191,6 +226,8 @@ class Panel:
 
         previous_panel = None
         for normalized_child_panel in sorted(normalized_raw_child_panels, key=lambda _: _['name'], reverse=self.child_panels_layout == 'vertical'):
+            deadline.check()
+
             if self.child_panels_layout == 'horizontal':
                 y_offset = (self.scaled_height - normalized_child_panel['height'] * self.scale_factor) / 2
             elif self.child_panels_layout == 'vertical':
@@ -208,42 +245,131 @@ class Panel:
                     y_offset = 0
 
             panel = Panel(
-                x=self.x + x_offset,
-                y=self.y + y_offset,
+                x=x_offset,
+                y=y_offset,
                 parent_panel=self,
-                raw_params=normalized_child_panel
-            ).set_context(self.context).draw()
+                raw_params=normalized_child_panel,
+                scale_factor=self.scale_factor
+            ).layout(deadline, cache)
 
             self.child_panels.append(panel)
 
             previous_panel = panel
 
-    def _draw_size_labels(self, _type='primary'):
+    def _place_size_labels(self, _type='primary', label_runs=None):
         """
+        Places the size labels against the labels placed before them, nothing is drawn
         :param _type: primary/dlo
+        :param label_runs: (panel, label type) -> run of panels sharing one label, see _size_label_runs
         """
         from components.size_label import SizeLabel
 
         if _type == 'primary':
-            width_label = SizeLabel(panel=self, label_type='width')
-            height_label = SizeLabel(panel=self, label_type='height')
-            width_label.draw()
-            height_label.draw()
-            self._size_labels.append(width_label)
-            self._size_labels.append(height_label)
+            label_types = ['width', 'height']
         elif _type == 'dlo' and self.panel_type == 'panel':
-            dlo_width_label = SizeLabel(panel=self, label_type='dlo_width')
-            dlo_height_label = SizeLabel(panel=self, label_type='dlo_height')
-            dlo_width_label.draw()
-            dlo_height_label.draw()
-            self._size_labels.append(dlo_width_label)
-            self._size_labels.append(dlo_height_label)
+            label_types = ['dlo_width', 'dlo_height']
+        else:
+            return
+
+        size_labels = []
+        for label_type in label_types:
+            # a collapsed run is labelled once, by its first panel
+            panels = (label_runs or {}).get((self, label_type), [self])
+            if panels[0] is self:
+                size_labels.append(SizeLabel(panel=self, label_type=label_type, panels=panels).place())
+
+        # both labels are placed before either is appended, so they are never checked against each other
+        self._size_labels.extend(size_labels)
+
+    def _size_label_runs(self):
+        """
+        Groups the children whose labels collapse into one, e.g. "4 @ 24 1/2'": runs of the same dimension
+        whose spans either coincide or follow each other without a gap along the label's axis
+        :return: (panel, label type) -> run of panels in the order of the children
+        """
+        from components.size_label import SizeLabel
+
+        label_runs = {}
+        for label_type in ['width', 'height', 'dlo_width', 'dlo_height']:
+            labels = [
+                SizeLabel(panel=_, label_type=label_type) for _ in self.child_panels
+                if _.panel_type == 'panel' or 'dlo' not in label_type
+            ]
+            labels.sort(key=lambda _: _.panel_span(_.panel))
+
+            runs = []
+            for label in labels:
+                if runs and self.__continues_run(runs[-1][-1], label):
+                    runs[-1].append(label)
+                else:
+                    runs.append([label])
+
+            for run in runs:
+                panels = sorted([_.panel for _ in run], key=self.child_panels.index)
+                for panel in panels:
+                    label_runs[(panel, label_type)] = panels
+
+        return label_runs
+
+    @staticmethod
+    def __continues_run(previous_label, label) -> bool:
+        if previous_label.dimension != label.dimension:
+            return False
+
+        if previous_label.panel_span(previous_label.panel) == label.panel_span(label.panel):
+            return True
+
+        # the panels themselves have to touch, dlo spans always have the frame between them
+        if label.type in ['width', 'dlo_width']:
+            previous_end, start = previous_label.panel.x + previous_label.panel.scaled_width, label.panel.x
+        else:
+            previous_end, start = previous_label.panel.y + previous_label.panel.scaled_height, label.panel.y
+
+        return math.isclose(previous_end, start, abs_tol=1e-6)
+
+    def _drawn_size_labels(self, _type='primary'):
+        """
+        :param _type: primary/dlo
+        """
+        label_types = ['width', 'height'] if _type == 'primary' else ['dlo_width', 'dlo_height']
+
+        return [_ for _ in self._size_labels if _.type in label_types]
 
-    def _draw_move_direction(self):
-        self.context.save()
+    def drawn_size_labels(self):
+        """Size labels of a laid out root frame in drawing order: the dlo labels, then the primary ones"""
+        size_labels = list(itertools.chain(*[_._drawn_size_labels(_type='dlo') for _ in self.child_panels]))
+        size_labels += itertools.chain(*[_._drawn_size_labels(_type='primary') for _ in self.child_panels])
+
+        return size_labels + self._drawn_size_labels(_type='primary')
+
+    def spatial_index(self, reflection: Reflection = None) -> SpatialIndex:
+        """
+        Index of the laid out tree as drawn with the reflection, built once per tree and reflection
+        """
+        key = reflection.axis_x if reflection else None
+        if key not in self._spatial_indexes:
+            self._spatial_indexes[key] = SpatialIndex.of_panel(self, reflection)
+
+        return self._spatial_indexes[key]
+
+    @property
+    def move_direction_arrow_length(self):
+        if self.move_direction in ['left', 'right']:
+            return self.scaled_dlo_width * 0.1
+        elif self.move_direction in ['up', 'down']:
+            return self.scaled_dlo_height * 0.1
+
+        return 0
+
+    @property
+    def dlo_inset(self):
+        """Smallest gap between the panel's outline and its DLO"""
+        return min(self.scaled_width - self.scaled_dlo_width, self.scaled_height - self.scaled_dlo_height) / 2
+
+    def _draw_move_direction(self, context):
+        context.save()
 
         arrow_angle = math.pi
-        arrow_length = 0
         arrow_x, arrow_y = 0, 0
 
         dlo_x_offset = (self.scaled_width - self.scaled_dlo_width) / 2
@@ -252,51 +378,48 @@ class Panel:
         if self.move_direction == 'left':
             arrow_angle = math.pi
 
-            arrow_x = self.x + dlo_x_offset + self.scaled_dlo_width
-            arrow_y = self.y + dlo_y_offset + self.scaled_height / 2
+            arrow_x = dlo_x_offset + self.scaled_dlo_width
+            arrow_y = dlo_y_offset + self.scaled_height / 2
 
         elif self.move_direction == 'up':
             arrow_angle = math.pi / 2
 
-            arrow_x = self.x + dlo_x_offset + self.scaled_dlo_width / 2
-            arrow_y = self.y + dlo_y_offset
+            arrow_x = dlo_x_offset + self.scaled_dlo_width / 2
+            arrow_y = dlo_y_offset
 
         elif self.move_direction == 'down':
             arrow_angle = - math.pi / 2
 
-            arrow_x = self.x + dlo_x_offset + self.scaled_dlo_width / 2
-            arrow_y = self.y + dlo_y_offset + self.scaled_dlo_height
+            arrow_x = dlo_x_offset + self.scaled_dlo_width / 2
+            arrow_y = dlo_y_offset + self.scaled_dlo_height
 
         elif self.move_direction == 'right':
             arrow_angle = 0
 
-            arrow_x = self.x + dlo_x_offset
-            arrow_y = self.y + dlo_y_offset + self.scaled_height / 2
+            arrow_x = dlo_x_offset
+            arrow_y = dlo_y_offset + self.scaled_height / 2
 
-        if self.move_direction in ['left', 'right']:
-            arrow_length = self.scaled_dlo_width * 0.1
-        elif self.move_direction in ['up', 'down']:
-            arrow_length = self.scaled_dlo_height * 0.1
+        arrow_length = self.move_direction_arrow_length
 
         arrowhead_angle = math.pi / 6
         arrowhead_length = arrow_length / 2.25
 
-        self.context.set_source_rgba(0, 0, 0, 1)
+        context.set_source_rgba(0, 0, 0, 1)
 
-        self.context.move_to(arrow_x, arrow_y)  # move to center of canvas
+        context.move_to(arrow_x, arrow_y)  # move to center of canvas
 
-        self.context.rel_line_to(arrow_length * math.cos(arrow_angle), arrow_length * math.sin(arrow_angle))
-        self.context.rel_move_to(-arrowhead_length * math.cos(arrow_angle - arrowhead_angle),
-                                 -arrowhead_length * math.sin(arrow_angle - arrowhead_angle))
-        self.context.rel_line_to(arrowhead_length * math.cos(arrow_angle - arrowhead_angle),
-                                 arrowhead_length * math.sin(arrow_angle - arrowhead_angle))
-        self.context.rel_line_to(-arrowhead_length * math.cos(arrow_angle + arrowhead_angle),
-                                 -arrowhead_length * math.sin(arrow_angle + arrowhead_angle))
+        context.rel_line_to(arrow_length * math.cos(arrow_angle), arrow_length * math.sin(arrow_angle))
+        context.rel_move_to(-arrowhead_length * math.cos(arrow_angle - arrowhead_angle),
+                            -arrowhead_length * math.sin(arrow_angle - arrowhead_angle))
+        context.rel_line_to(arrowhead_length * math.cos(arrow_angle - arrowhead_angle),
+                            arrowhead_length * math.sin(arrow_angle - arrowhead_angle))
+        context.rel_line_to(-arrowhead_length * math.cos(arrow_angle + arrowhead_angle),
+                            -arrowhead_length * math.sin(arrow_angle + arrowhead_angle))
 
-        self.context.set_line_width(1)
-        self.context.stroke()
+        context.set_line_width(1)
+        context.stroke()
 
-        self.context.restore()
+        context.restore()
 
     # def _scale_child_panels(self):
     #     ###
@@ -346,47 +469,148 @@ class Panel:
 
         return orientation
 
-    def draw(self):
+    def layout(self, deadline: Deadline = None, cache: bool = True):
+        """
+        Positions the child panels, relative to this panel, and places the size labels of the root frame.
+        Nothing is drawn and the panel keeps no reference to a context,
+        so a laid out tree can be cached and drawn onto any number of contexts
+        :param cache: false to not keep the laid out shared subtrees, e.g. for the trial scales of
+                      Canvas.calculate_scale_factor, see cache_subtrees
+        """
+        deadline = deadline or Deadline()
+        deadline.check()
+
+        if self.is_shared:
+            child_panels = SubtreeCacheService(self.subtree_key).get_child_panels()
+            if child_panels is not None:
+                self.child_panels = child_panels
+                return self
+
         if self.raw_params.get('panels', []):
-            self._draw_child_panels()
+            self._layout_child_panels(deadline, cache)
         elif self.raw_params.get('frames', []):
-            self._draw_child_frames()
+            self._layout_child_frames(deadline, cache)
 
-        if self.panel_type == 'frame':
-            self._draw_frame()
-        elif self.panel_type == 'panel':
-            self._draw_panel()
-            self._draw_panel_dlo()
+        if self.is_shared and cache:
+            SubtreeCacheService(self.subtree_key).put_child_panels(self.child_panels)
 
         if not self.parent_panel:
-            for child_panel in self.child_panels:
-                child_panel._draw_size_labels(_type='dlo')
+            label_runs = self._size_label_runs() if self.collapse_labels else {}
 
             for child_panel in self.child_panels:
-                child_panel._draw_size_labels(_type='primary')
+                deadline.check()
+                child_panel._place_size_labels(_type='dlo', label_runs=label_runs)
 
-            self._draw_size_labels(_type='primary')
+            for child_panel in self.child_panels:
+                deadline.check()
+                child_panel._place_size_labels(_type='primary', label_runs=label_runs)
 
-        if self.move_direction:
-            self._draw_move_direction()
+            self._place_size_labels(_type='primary')
 
         return self
 
-    @property
-    def context(self) -> cairo.Context:
-        if not self._context:
-            raise NotImplementedError
+    def cache_subtrees(self):
+        """Keeps the shared subtrees of a tree laid out without caching them, once it is the one drawn"""
+        if self.is_shared:
+            SubtreeCacheService(self.subtree_key).put_child_panels(self.child_panels)
 
-        return self._context
+        for child_panel in self.child_panels:
+            child_panel.cache_subtrees()
 
-    def set_context(self, context):
+    def draw(self, context: cairo.Context, deadline: Deadline = None, level_of_detail: LevelOfDetail = None,
+             draw_labels: bool = True, reflection: Reflection = None, viewport=None, visible_panels=None):
         """
-        Sets a context to draw a panel onto
+        Draws a laid out panel, its children and, for the root frame, the size labels
+        :param level_of_detail: details too small to be seen are skipped
+        :param draw_labels: false when the canvas has no label bands, e.g. for thumbnails
+        :param reflection: mirrors the root frame, e.g. for the interior elevation
+        :param viewport: (min x, min y, max x, max y) box drawn into, in the coordinates of the panel's parent,
+                         panels and labels outside of it are skipped, e.g. when rasterizing a strip of a png
+        :param visible_panels: the frames and panels in the viewport, looked up by the panel the viewport is given to
         """
-        self._context = context
+        from components.size_label import SizeLabel
+
+        deadline = deadline or Deadline()
+        level_of_detail = level_of_detail or LevelOfDetail()
+        deadline.check()
+
+        if viewport is not None and visible_panels is None:
+            # the frames and panels in the viewport are looked up once instead of testing every one on the way down
+            visible_panels = {_.item for _ in self.spatial_index(reflection).query(viewport, kinds=['frame', 'panel'])}
+
+        if visible_panels is None or self in visible_panels:
+            context.save()
+            if reflection:
+                reflection.apply(context)
+            context.translate(self.x, self.y)
+
+            if self.is_shared:
+                # the recording is shared by every viewport, it is clipped when replayed
+                self._replay_fragment(context, deadline, level_of_detail)
+            else:
+                self._draw_fragment(context, deadline, level_of_detail, visible_panels)
+
+            context.restore()
+
+        if not self.parent_panel and draw_labels and level_of_detail.draws_labels(SizeLabel.TEXT_SIZE):
+            if viewport is None:
+                size_labels = self.drawn_size_labels()
+            else:
+                # only the labels in the viewport are looked up, e.g. for a tile of a huge elevation
+                size_labels = [_.item for _ in self.spatial_index(reflection).query(viewport, kinds=['label'])]
+
+            for size_label in size_labels:
+                deadline.check()
+                size_label.draw(context, reflection)
 
         return self
 
+    def _draw_fragment(self, context: cairo.Context, deadline: Deadline, level_of_detail: LevelOfDetail,
+                       visible_panels=None):
+        """
+        Draws the children, the outline and the move direction in the panel's own coordinates.
+        A panel too small to show its insides is drawn as its outline only
+        :param visible_panels: only these children are drawn, all of them if None
+        """
+        has_visible_insides = level_of_detail.draws_detail(min(self.scaled_width, self.scaled_height))
+
+        if has_visible_insides:
+            for child_panel in self.child_panels:
+                deadline.check()
+                child_panel.draw(context, deadline, level_of_detail, visible_panels=visible_panels)
+
+        if self.panel_type == 'frame':
+            self._draw_frame(context)
+        elif self.panel_type == 'panel':
+            self._draw_panel(context)
+            if has_visible_insides and level_of_detail.draws_detail(self.dlo_inset):
+                self._draw_panel_dlo(context)
+
+        if self.move_direction and has_visible_insides and \
+                level_of_detail.draws_arrow(self.move_direction_arrow_length):
+            self._draw_move_direction(context)
+
+    def _replay_fragment(self, context: cairo.Context, deadline: Deadline, level_of_detail: LevelOfDetail):
+        """
+        Replays the recorded drawing of the subtree, it is recorded by the first panel of the subtree drawn
+        """
+        # the recorded drawing depends on which details were visible and on how curves and edges are rasterized
+        antialias, tolerance = context.get_antialias(), context.get_tolerance()
+        service = SubtreeCacheService(f"{self.subtree_key}/{level_of_detail.key}/{antialias}/{tolerance}")
+
+        fragment = service.get_fragment()
+        if fragment is None:
+            fragment = cairo.RecordingSurface(cairo.CONTENT_COLOR_ALPHA, None)
+            fragment_context = cairo.Context(fragment)
+            fragment_context.set_antialias(antialias)
+            fragment_context.set_tolerance(tolerance)
+
+            self._draw_fragment(fragment_context, deadline, level_of_detail)
+            service.put_fragment(fragment, self.subtree_size)
+
+        context.set_source_surface(fragment, 0, 0)
+        context.paint()
+
     @property
     def size_labels(self):
         child_panels_labels = list(itertools.chain(*[_._size_labels for _ in self.child_panels]))
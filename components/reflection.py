@@ -0,0 +1,54 @@
+from functools import cached_property
+from typing import Dict, Optional, Tuple
+
+import cairo
+
+
+class Reflection:
+    """
+    Mirrors a laid out unit across a vertical axis at draw time, so one layout serves both of its orientations:
+    - the left and right variants of the directed shapes, which are planned pointing left only
+    - the exterior and the interior elevation of a unit, the interior one is seen from the inside of the building
+
+    Outlines, muntins and arrows are drawn through the reflection matrix.
+    Labels are not, their text would read backwards: they are moved to where the span they dimension is mirrored to.
+    """
+    def __init__(self, axis_x: float):
+        """
+        :param axis_x: x of the mirror axis, in the coordinates of the laid out unit
+        """
+        self.axis_x = axis_x
+
+    @classmethod
+    def from_raw_params(cls, raw_params: Dict, axis_x: float, mirrored: bool = False) -> Optional['Reflection']:
+        """
+        :param mirrored: the layout is mirrored to its exterior elevation, e.g. a shape pointing right
+        :return: None if the unit is drawn as laid out
+        """
+        # the interior elevation mirrors the exterior one
+        if mirrored == (raw_params.get('elevation', 'exterior') == 'interior'):
+            return None
+
+        return cls(axis_x)
+
+    @cached_property
+    def matrix(self) -> cairo.Matrix:
+        return cairo.Matrix(xx=-1, x0=2 * self.axis_x)
+
+    def apply(self, context: cairo.Context):
+        context.transform(self.matrix)
+
+    def offset(self, min_x: float, max_x: float) -> float:
+        """Horizontal move taking the span [min_x, max_x] onto its mirror image, without flipping it"""
+        return 2 * self.axis_x - min_x - max_x
+
+    def mirror_point(self, point: Tuple[float, float]) -> Tuple[float, float]:
+        return 2 * self.axis_x - point[0], point[1]
+
+    def mirror_box(self, box: Tuple[float, float, float, float]) -> Tuple[float, float, float, float]:
+        return 2 * self.axis_x - box[2], box[1], 2 * self.axis_x - box[0], box[3]
+
+    @staticmethod
+    def move_box(box: Tuple[float, float, float, float], offset: float) -> Tuple[float, float, float, float]:
+        """Box of a label moved by its `offset`"""
+        return box[0] + offset, box[1], box[2] + offset, box[3]
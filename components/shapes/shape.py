@@ -0,0 +1,289 @@
+import math
+from copy import deepcopy
+from functools import cached_property
+from typing import Dict, List, Tuple
+
+import cairo
+
+from components.deadline import Deadline
+from components.level_of_detail import LevelOfDetail
+from components.reflection import Reflection
+from components.spatial_index import SpatialIndex
+from components.shapes.shape_label import ShapeLabel
+
+
+class Shape:
+    """
+    Base of the shaped units: arches, circles, triangles, ...
+
+    A shape is planned once and drawn any number of times:
+    - `plan` turns the panels of a frame into child shapes, each built from a copy of its panel's params,
+      so neither the spec nor the frame are changed and the planned tree can be cached and shared
+    - `draw` only reads the planned tree and draws it onto the given context
+
+    Frames draw their outline, panels their outline and muntins.
+    `bounding_box` reports the exact extent of the drawing, the canvas is sized by it.
+
+    Directed shapes are planned pointing left only, the other direction is drawn through a `Reflection`.
+    """
+    # distance of the width/height labels from the outline, in label side lengths
+    FRAME_LABEL_SIDES = 2
+    PANEL_LABEL_SIDES = 1
+
+    # direction drawn as the mirror image of the planned shape, None for shapes without a direction
+    MIRRORED_DIRECTION = None
+
+    # largest angle between the points of an arc in an outline polygon
+    POLYGON_ARC_STEP = math.pi / 36
+
+    def __init__(self, x=0, y=0, raw_params=None, scale_factor=1, parent_shape=None, x_offset=0, y_offset=0):
+        """
+        :param parent_shape: frame of a panel, None for the frame itself
+        :param x_offset: inset of a panel in its frame, as planned by the frame
+        :param y_offset: inset of a panel in its frame, as planned by the frame
+        """
+        self.x = x
+        self.y = y
+        self.raw_params = raw_params
+        self.scale_factor = scale_factor
+        self.parent_shape = parent_shape
+        self.x_offset = x_offset
+        self.y_offset = y_offset
+
+        # shaped units have no nested frames, see ShapeLabel.text
+        self.parent_panel = None
+
+        self.panel_type = raw_params['panel_type']
+        self.name = raw_params['name'] if raw_params['panel_type'] == 'panel' else 'frame'
+
+        self.child_shapes = ()
+        self._spatial_indexes = {}
+
+    @property
+    def width(self):
+        return self.raw_params['width']
+
+    @property
+    def height(self):
+        return self.raw_params['height']
+
+    @property
+    def dlo_width(self):
+        return self.raw_params['dlo_width']
+
+    @property
+    def dlo_height(self):
+        return self.raw_params['dlo_height']
+
+    @property
+    def scaled_width(self):
+        return self.width * self.scale_factor
+
+    @property
+    def scaled_height(self):
+        return self.height * self.scale_factor
+
+    @property
+    def scaled_dlo_width(self):
+        return self.dlo_width * self.scale_factor
+
+    @property
+    def scaled_dlo_height(self):
+        return self.dlo_height * self.scale_factor
+
+    @property
+    def size_labels(self):
+        # labels of shapes are placed at fixed distances, they are never checked against each other
+        return []
+
+    @property
+    def label_distance(self):
+        sides = self.PANEL_LABEL_SIDES if self.parent_shape else self.FRAME_LABEL_SIDES
+        return sides * ShapeLabel.LABEL_SIDE_LENGTH
+
+    @property
+    def outline_box(self) -> Tuple[float, float, float, float]:
+        """(min x, min y, max x, max y) of the outline, muntins stay inside of it"""
+        return self.x, self.y, self.x + self.scaled_width, self.y + self.scaled_height
+
+    @property
+    def outline_polygon(self) -> List[Tuple[float, float]]:
+        """Corners of the outline, arcs are flattened into points POLYGON_ARC_STEP apart"""
+        min_x, min_y, max_x, max_y = self.outline_box
+
+        return [(min_x, min_y), (max_x, min_y), (max_x, max_y), (min_x, max_y)]
+
+    def bounding_box(self, draw_label: bool = True, label_text_size: float = ShapeLabel.TEXT_SIZE,
+                     reflection: Reflection = None) -> Tuple[float, float, float, float]:
+        """
+        (min x, min y, max x, max y) of the shape, its panels and their labels as drawn with the same arguments
+        """
+        outline_box = self.outline_box
+        label_boxes = [_.bounding_box for _ in self.labels(label_text_size)] if draw_label else []
+
+        if reflection:
+            offset = reflection.offset(outline_box[0], outline_box[2])
+            label_boxes = [reflection.move_box(_, offset) for _ in label_boxes]
+            outline_box = reflection.mirror_box(outline_box)
+
+        boxes = [outline_box] + label_boxes
+        boxes += [_.bounding_box(draw_label, label_text_size, reflection) for _ in self.child_shapes]
+
+        return self.union_box(*boxes)
+
+    @staticmethod
+    def arc_box(center_x, center_y, radius, start_angle, end_angle) -> Tuple[float, float, float, float]:
+        """
+        Bounding box of an arc drawn like cairo's `arc`, from the start angle in the direction of increasing angles
+        """
+        while end_angle < start_angle:
+            end_angle += 2 * math.pi
+
+        # the ends of the arc and where it crosses the axes
+        quarter = math.pi / 2
+        angles = [start_angle, end_angle] + [
+            _ * quarter for _ in range(math.ceil(start_angle / quarter), math.floor(end_angle / quarter) + 1)
+        ]
+        xs = [center_x + radius * math.cos(_) for _ in angles]
+        ys = [center_y + radius * math.sin(_) for _ in angles]
+
+        return min(xs), min(ys), max(xs), max(ys)
+
+    @classmethod
+    def arc_points(cls, center_x, center_y, radius, start_angle, end_angle) -> List[Tuple[float, float]]:
+        """Points of an arc drawn like cairo's `arc`, from the start angle in the direction of increasing angles"""
+        while end_angle < start_angle:
+            end_angle += 2 * math.pi
+
+        steps = max(1, math.ceil((end_angle - start_angle) / cls.POLYGON_ARC_STEP))
+        angles = [start_angle + (end_angle - start_angle) * _ / steps for _ in range(steps + 1)]
+
+        return [(center_x + radius * math.cos(_), center_y + radius * math.sin(_)) for _ in angles]
+
+    @staticmethod
+    def union_box(*boxes) -> Tuple[float, float, float, float]:
+        return (min([_[0] for _ in boxes]), min([_[1] for _ in boxes]),
+                max([_[2] for _ in boxes]), max([_[3] for _ in boxes]))
+
+    def labels(self, label_text_size: float = ShapeLabel.TEXT_SIZE) -> List[ShapeLabel]:
+        return [ShapeLabel(panel=self, label_type=label_type, coordinates=coordinates, text_size=label_text_size)
+                for label_type, coordinates in self.label_coordinates.items()]
+
+    @cached_property
+    def label_coordinates(self) -> Dict[str, Dict]:
+        """Corners of the width and the height label, see ShapeLabel"""
+        return self._label_coordinates()
+
+    def _label_coordinates(self) -> Dict[str, Dict]:
+        return {
+            'width': {
+                "x1": self.x,
+                "y1": self.y + self.scaled_height,
+                "x2": self.x,
+                "y2": self.y + self.scaled_height + self.label_distance,
+                "x3": self.x + self.scaled_width,
+                "y3": self.y + self.scaled_height + self.label_distance,
+                "x4": self.x + self.scaled_width,
+                "y4": self.y + self.scaled_height
+            },
+            'height': {
+                "x1": self.x,
+                "y1": self.y,
+                "x2": self.x - self.label_distance,
+                "y2": self.y,
+                "x3": self.x - self.label_distance,
+                "y3": self.y + self.scaled_height,
+                "x4": self.x,
+                "y4": self.y + self.scaled_height
+            },
+        }
+
+    def plan(self, deadline: Deadline = None) -> 'Shape':
+        """
+        Plans the panels of a frame
+        :return: the planned frame
+        """
+        deadline = deadline or Deadline()
+
+        child_shapes = []
+        for raw_panel in self.raw_params['panels']:
+            deadline.check()
+            child_shapes.append(self._plan_panel(deepcopy(raw_panel)))
+
+        self.child_shapes = tuple(child_shapes)
+
+        return self
+
+    def spatial_index(self, label_text_size: float = None, reflection: Reflection = None) -> SpatialIndex:
+        """
+        Index of the planned shape as drawn with the arguments, built once per planned shape and arguments
+        :param label_text_size: size of the drawn labels, None if they are not drawn
+        """
+        key = (label_text_size, reflection.axis_x if reflection else None)
+        if key not in self._spatial_indexes:
+            self._spatial_indexes[key] = SpatialIndex.of_shape(self, label_text_size, reflection)
+
+        return self._spatial_indexes[key]
+
+    @classmethod
+    def mirrors(cls, direction: str) -> bool:
+        """A shape pointing in the direction is drawn as the mirror image of the planned one"""
+        return cls.MIRRORED_DIRECTION is not None and direction == cls.MIRRORED_DIRECTION
+
+    def draw(self, context: cairo.Context, deadline: Deadline = None, level_of_detail: LevelOfDetail = None,
+             draw_label: bool = True, label_text_size: float = ShapeLabel.TEXT_SIZE, reflection: Reflection = None):
+        """
+        Draws a planned shape, its labels and its panels
+        :param level_of_detail: muntins too small to be seen are skipped
+        :param label_text_size: TEXT_SIZE for svg, PNG_TEXT_SIZE for png
+        :param reflection: mirrors the drawing, e.g. for the right pointing variant or the interior elevation
+        """
+        deadline = deadline or Deadline()
+        level_of_detail = level_of_detail or LevelOfDetail()
+        deadline.check()
+
+        if reflection:
+            context.save()
+            reflection.apply(context)
+
+        if self.parent_shape:
+            self._draw_panel(context, level_of_detail)
+        else:
+            self._draw_frame(context)
+
+        if reflection:
+            context.restore()
+
+        if draw_label:
+            self._draw_labels(context, label_text_size, reflection)
+
+        for child_shape in self.child_shapes:
+            child_shape.draw(context, deadline, level_of_detail, draw_label, label_text_size, reflection)
+
+    def _draw_labels(self, context: cairo.Context, label_text_size: float, reflection: Reflection = None):
+        if not reflection:
+            for label in self.labels(label_text_size):
+                label.draw(context)
+            return
+
+        # labels move along with the mirrored outline, their text is not mirrored
+        outline_box = self.outline_box
+
+        context.save()
+        context.translate(reflection.offset(outline_box[0], outline_box[2]), 0)
+        for label in self.labels(label_text_size):
+            label.draw(context)
+        context.restore()
+
+    def _plan_panel(self, raw_panel: Dict) -> 'Shape':
+        """
+        :param raw_panel: copy of the panel's params, free to be adjusted to the frame
+        :return: child shape of the panel
+        """
+        raise NotImplementedError
+
+    def _draw_frame(self, context: cairo.Context):
+        raise NotImplementedError
+
+    def _draw_panel(self, context: cairo.Context, level_of_detail: LevelOfDetail):
+        raise NotImplementedError
@@ -3,6 +3,7 @@ from functools import cached_property
 import cairo
 import math
 
+from components.font import Font
 from enums.colors import Colors
 
 
@@ -14,22 +15,25 @@ class ShapeLabel:
     STROKE_FORMAT = [3, 3]  # fill 3 pixels & skip 3 pixels
 
     TEXT_SIZE = 10
+    PNG_TEXT_SIZE = 15
     TEXT_OFFSET = 2
 
-    def __init__(self, panel, label_type: str, coordinates=None):
+    def __init__(self, panel, label_type: str, coordinates=None, text_size=TEXT_SIZE):
         """
         :param panel:
         :param label_type: width/height/dlo_width/dlo_height
+        :param text_size: TEXT_SIZE for svg, PNG_TEXT_SIZE for png
         """
         if coordinates is None:
             coordinates = {}
         self.panel = panel
         self.type = label_type
         self.coordinates = coordinates
+        self.text_size = text_size
 
-    def draw(self):
-        self._draw_label()
-        self._draw_text()
+    def draw(self, context: cairo.Context):
+        self._draw_label(context)
+        self._draw_text(context)
 
     @cached_property
     def text(self):
@@ -56,35 +60,30 @@ class ShapeLabel:
 
         return text
 
-    def _draw_label(self):
-        self.context.save()
-        self.context.set_source_rgba(*Colors.LIGHT_GREY)
-        self.context.set_line_width(self.STROKE_WIDTH)
-        self.context.set_dash(self.STROKE_FORMAT)
+    def _draw_label(self, context: cairo.Context):
+        context.save()
+        context.set_source_rgba(*Colors.visible_on(context, Colors.LIGHT_GREY))
+        context.set_line_width(self.STROKE_WIDTH)
+        context.set_dash(self.STROKE_FORMAT)
 
-        self.context.move_to(self.x1, self.y1)
-        self.context.line_to(self.x2, self.y2)
-        self.context.line_to(self.x3, self.y3)
-        self.context.line_to(self.x4, self.y4)
-        self.context.stroke()
-        self.context.restore()
+        context.move_to(self.x1, self.y1)
+        context.line_to(self.x2, self.y2)
+        context.line_to(self.x3, self.y3)
+        context.line_to(self.x4, self.y4)
+        context.stroke()
+        context.restore()
 
-    def _draw_text(self):
-        self.context.save()
-        self.context.set_source_rgba(*Colors.BLACK)
-        self.context.set_font_matrix(cairo.Matrix(xx=self.TEXT_SIZE, yy=-self.TEXT_SIZE))
+    def _draw_text(self, context: cairo.Context):
+        context.save()
+        context.set_source_rgba(*Colors.BLACK)
 
-        self.context.move_to(self.text_x1, self.text_y1)
+        context.translate(self.text_x1, self.text_y1)
 
         if self.type in ['height', 'dlo_height']:
-            self.context.rotate(math.pi / 2)
+            context.rotate(math.pi / 2)
 
-        self.context.show_text(self.text)
-        self.context.restore()
-
-    @property
-    def context(self) -> cairo.Context:
-        return self.panel.context
+        Font.get(self.text_size).show(context, self.text)
+        context.restore()
 
     @property
     def root_frame(self):
@@ -376,6 +375,11 @@ class ShapeLabel:
         elif self.type in ['height', 'dlo_height']:
             return self.y2 + self.TEXT_OFFSET
 
+    @cached_property
+    def text_width(self):
+        """Length of the text along its baseline"""
+        return Font.get(self.text_size).text_width(self.text)
+
     @cached_property
     def text_x2(self):
         """
@@ -385,7 +389,7 @@ class ShapeLabel:
         |                          |
         """
         if self.type in ['width', 'dlo_width']:
-            return self.text_x1 + len(self.text) * (self.TEXT_SIZE / 2)
+            return self.text_x1 + self.text_width
         elif self.type in ['height', 'dlo_height']:
             return self.text_x1
 
@@ -409,7 +413,25 @@ class ShapeLabel:
         if self.type in ['width', 'dlo_width']:
             return self.text_y1
         elif self.type in ['height', 'dlo_height']:
-            return self.text_y1 + len(self.text) * (self.TEXT_SIZE / 2)
+            return self.text_y1 + self.text_width
+
+    @cached_property
+    def bounding_box(self):
+        """
+        (min x, min y, max x, max y) of the leader line and the text,
+        the glyphs rise by the font's ascent above the baseline (to the left of it for rotated text)
+        """
+        ascent = Font.get(self.text_size).ascent
+
+        if self.type in ['width', 'dlo_width']:
+            text_box = (self.text_x1, self.text_y1, self.text_x2, self.text_y1 + ascent)
+        else:
+            text_box = (self.text_x1 - ascent, self.text_y1, self.text_x1, self.text_y2)
+
+        xs = [self.x1, self.x2, self.x3, self.x4, text_box[0], text_box[2]]
+        ys = [self.y1, self.y2, self.y3, self.y4, text_box[1], text_box[3]]
+
+        return min(xs), min(ys), max(xs), max(ys)
 
     @staticmethod
     def __convert_to_fraction(original_number: float) -> str:
@@ -3,6 +3,8 @@ from functools import cached_property
 import cairo
 import math
 
+from components.font import Font
+from components.reflection import Reflection
 from enums.colors import Colors
 
 
@@ -16,20 +18,95 @@ class SizeLabel:
     TEXT_SIZE = 10
     TEXT_OFFSET = 2
 
-    def __init__(self, panel, label_type: str):
+    COORDINATES = ('x1', 'y1', 'x2', 'y2', 'x3', 'y3', 'x4', 'y4', 'text_x1', 'text_y1', 'text_x2', 'text_y2')
+
+    def __init__(self, panel, label_type: str, panels=None):
         """
         :param panel:
         :param label_type: width/height/dlo_width/dlo_height
+        :param panels: run of panels with the same dimension the label collapses, the panel is one of them
         """
         self.panel = panel
         self.type = label_type
+        self.panels = panels or [panel]
+
+    def place(self):
+        """
+        Calculates the coordinates against the labels already placed on the root frame,
+        so it has to run before the label is added to them
+        """
+        for coordinate in self.COORDINATES:
+            getattr(self, coordinate)
+
+        return self
+
+    def draw(self, context: cairo.Context, reflection: Reflection = None):
+        """
+        :param reflection: the frame is drawn mirrored, the label is moved along with the panels it dimensions
+        """
+        offset = self.reflection_offset(reflection)
+        if offset:
+            context.save()
+            context.translate(offset, 0)
+
+        self._draw_label(context)
+        self._draw_text(context)
+
+        if offset:
+            context.restore()
+
+    def reflection_offset(self, reflection: Reflection = None) -> float:
+        """
+        Horizontal move of the label when the frame is drawn mirrored, heights stay in their band
+        since a vertical mirror axis does not change them
+        """
+        if not reflection or self.type not in ['width', 'dlo_width']:
+            return 0
+
+        return reflection.offset(min(self.x1, self.x4), max(self.x1, self.x4))
+
+    @cached_property
+    def dimension(self) -> str:
+        """Dimension as written on the label"""
+        raw_params = self.panel.raw_params
+
+        return self.__convert_to_fraction(raw_params.get(f"original_{self.type}") or raw_params[self.type])
+
+    @cached_property
+    def count(self) -> int:
+        """Number of distinct spans dimensioned by the label, e.g. 4 equal panels side by side"""
+        return len({self.panel_span(_) for _ in self.panels})
 
-    def draw(self):
-        self._draw_label()
-        self._draw_text()
+    def panel_span(self, panel):
+        """(start, length) of the dimensioned extent of a panel along the label's axis"""
+        if self.type == 'width':
+            return panel.x, panel.scaled_width
+        elif self.type == 'dlo_width':
+            return panel.x + (panel.scaled_width - panel.scaled_dlo_width) / 2, panel.scaled_dlo_width
+        elif self.type == 'height':
+            return panel.y, panel.scaled_height
+        elif self.type == 'dlo_height':
+            return panel.y + (panel.scaled_height - panel.scaled_dlo_height) / 2, panel.scaled_dlo_height
+
+    @cached_property
+    def span_start(self):
+        return min([self.panel_span(_)[0] for _ in self.panels])
+
+    @cached_property
+    def span_length(self):
+        if len(self.panels) == 1:
+            return self.panel_span(self.panel)[1]
+
+        return max([sum(self.panel_span(_)) for _ in self.panels]) - self.span_start
 
     @cached_property
     def text(self):
+        if len(self.panels) > 1:
+            # coinciding spans (e.g. the heights of side by side panels) are written once without a count
+            count = f"{self.count} @ " if self.count > 1 else ''
+            dlo = 'DLO ' if 'dlo' in self.type else ''
+            return f"{count}{dlo}{self.dimension}'"
+
         text = f"{self.panel.name.upper()}"
 
         if self.panel.panel_type == 'frame' and self.panel.parent_panel:
@@ -37,51 +114,37 @@ class SizeLabel:
             y_position = int(self.panel.raw_params['coordinates']['y'])
             text = f"{text} <{x_position}, {y_position}>"
 
-        label_width = self.panel.raw_params.get('original_width') or self.panel.raw_params['width']
-        label_height = self.panel.raw_params.get('original_height') or self.panel.raw_params['height']
-        label_dlo_width = self.panel.raw_params.get('original_dlo_width') or self.panel.raw_params['dlo_width']
-        label_dlo_height = self.panel.raw_params.get('original_dlo_height') or self.panel.raw_params['dlo_height']
-
-        if self.type == 'width':
-            text = f"{text}: {self.__convert_to_fraction(label_width)}'"
-        elif self.type == 'dlo_width':
-            text = f"{text} DLO: {self.__convert_to_fraction(label_dlo_width)}'"
-        elif self.type == 'height':
-            text = f"{text}: {self.__convert_to_fraction(label_height)}'"
-        elif self.type == 'dlo_height':
-            text = f"{text} DLO: {self.__convert_to_fraction(label_dlo_height)}'"
+        if self.type in ['width', 'height']:
+            text = f"{text}: {self.dimension}'"
+        elif self.type in ['dlo_width', 'dlo_height']:
+            text = f"{text} DLO: {self.dimension}'"
 
         return text
 
-    def _draw_label(self):
-        self.context.save()
-        self.context.set_source_rgba(*Colors.LIGHT_GREY)
-        self.context.set_line_width(self.STROKE_WIDTH)
-        self.context.set_dash(self.STROKE_FORMAT)
+    def _draw_label(self, context):
+        context.save()
+        context.set_source_rgba(*Colors.visible_on(context, Colors.LIGHT_GREY))
+        context.set_line_width(self.STROKE_WIDTH)
+        context.set_dash(self.STROKE_FORMAT)
 
-        self.context.move_to(self.x1, self.y1)
-        self.context.line_to(self.x2, self.y2)
-        self.context.line_to(self.x3, self.y3)
-        self.context.line_to(self.x4, self.y4)
-        self.context.stroke()
-        self.context.restore()
+        context.move_to(self.x1, self.y1)
+        context.line_to(self.x2, self.y2)
+        context.line_to(self.x3, self.y3)
+        context.line_to(self.x4, self.y4)
+        context.stroke()
+        context.restore()
 
-    def _draw_text(self):
-        self.context.save()
-        self.context.set_source_rgba(*Colors.BLACK)
-        self.context.set_font_matrix(cairo.Matrix(xx=self.TEXT_SIZE, yy=-self.TEXT_SIZE))
+    def _draw_text(self, context):
+        context.save()
+        context.set_source_rgba(*Colors.BLACK)
 
-        self.context.move_to(self.text_x1, self.text_y1)
+        context.translate(self.text_x1, self.text_y1)
 
         if self.type in ['height', 'dlo_height']:
-            self.context.rotate(math.pi / 2)
+            context.rotate(math.pi / 2)
 
-        self.context.show_text(self.text)
-        self.context.restore()
-
-    @property
-    def context(self) -> cairo.Context:
-        return self.panel.context
+        Font.get(self.TEXT_SIZE).show(context, self.text)
+        context.restore()
 
     @property
     def root_frame(self):
@@ -108,11 +171,8 @@ class SizeLabel:
         |
         (X2/Y2)--------(X1/Y1)
         """
-        if self.type == 'width':
-            return self.panel.x
-        elif self.type == 'dlo_width':
-            offset = (self.panel.scaled_width - self.panel.scaled_dlo_width) / 2
-            return self.panel.x + offset
+        if self.type in ['width', 'dlo_width']:
+            return self.span_start
         elif self.type in ['height', 'dlo_height']:
             return self.root_frame.x - self.LABEL_OFFSET
 
@@ -139,11 +199,8 @@ class SizeLabel:
 
         if self.type in ['width', 'dlo_width']:
             return self.root_frame.y + self.root_frame.scaled_height + self.LABEL_OFFSET
-        elif self.type == 'height':
-            return self.panel.y
-        elif self.type == 'dlo_height':
-            offset = (self.panel.scaled_height - self.panel.scaled_dlo_height) / 2
-            return self.panel.y + offset
+        elif self.type in ['height', 'dlo_height']:
+            return self.span_start
 
     @cached_property
     def x2(self):
@@ -232,10 +289,8 @@ class SizeLabel:
         |
         (X2/Y2)--------(X1/Y1)
         """
-        if self.type == 'width':
-            return self.x2 + self.panel.scaled_width
-        elif self.type == 'dlo_width':
-            return self.x2 + self.panel.scaled_dlo_width
+        if self.type in ['width', 'dlo_width']:
+            return self.x2 + self.span_length
         elif self.type in ['height', 'dlo_height']:
             return self.x2
 
@@ -261,10 +316,8 @@ class SizeLabel:
         """
         if self.type in ['width', 'dlo_width']:
             return self.y2
-        elif self.type == 'height':
-            return self.y2 + self.panel.scaled_height
-        elif self.type == 'dlo_height':
-            return self.y2 + self.panel.scaled_dlo_height
+        elif self.type in ['height', 'dlo_height']:
+            return self.y2 + self.span_length
 
     @cached_property
     def x4(self):
@@ -351,6 +404,11 @@ class SizeLabel:
         elif self.type in ['height', 'dlo_height']:
             return self.y2 + self.TEXT_OFFSET
 
+    @cached_property
+    def text_width(self):
+        """Length of the text along its baseline"""
+        return Font.get(self.TEXT_SIZE).text_width(self.text)
+
     @cached_property
     def text_x2(self):
         """
@@ -360,7 +418,7 @@ class SizeLabel:
         |                          |
         """
         if self.type in ['width', 'dlo_width']:
-            return self.text_x1 + len(self.text) * (self.TEXT_SIZE / 2)
+            return self.text_x1 + self.text_width
         elif self.type in ['height', 'dlo_height']:
             return self.text_x1
 
@@ -384,7 +442,25 @@ class SizeLabel:
         if self.type in ['width', 'dlo_width']:
             return self.text_y1
         elif self.type in ['height', 'dlo_height']:
-            return self.text_y1 + len(self.text) * (self.TEXT_SIZE / 2)
+            return self.text_y1 + self.text_width
+
+    @cached_property
+    def bounding_box(self):
+        """
+        (min x, min y, max x, max y) of the leader line and the text,
+        the glyphs rise by the font's ascent above the baseline (to the left of it for rotated text)
+        """
+        ascent = Font.get(self.TEXT_SIZE).ascent
+
+        if self.type in ['width', 'dlo_width']:
+            text_box = (self.text_x1, self.text_y1, self.text_x2, self.text_y1 + ascent)
+        else:
+            text_box = (self.text_x1 - ascent, self.text_y1, self.text_x1, self.text_y2)
+
+        xs = [self.x1, self.x2, self.x3, self.x4, text_box[0], text_box[2]]
+        ys = [self.y1, self.y2, self.y3, self.y4, text_box[1], text_box[3]]
+
+        return min(xs), min(ys), max(xs), max(ys)
 
     @staticmethod
     def __convert_to_fraction(original_number: float) -> str:
@@ -0,0 +1,163 @@
+import math
+from collections import defaultdict
+from typing import TYPE_CHECKING, Iterable, List, Optional, Tuple
+
+from components.reflection import Reflection
+
+if TYPE_CHECKING:
+    from components.panel import Panel
+    from components.shapes.shape import Shape
+
+
+class IndexedElement:
+    """A drawn element of a laid out unit and its box, in the coordinates the unit is drawn in"""
+
+    def __init__(self, kind: str, box: Tuple[float, float, float, float], item, name: Optional[str], depth: int = 0):
+        """
+        :param kind: frame/panel/dlo/label
+        :param item: the Panel, Shape or label the element is drawn by
+        :param name: name of the frame or panel in the spec, for labels the one of the panel they dimension
+        :param depth: nesting depth of the frame or panel, the root is 0
+        """
+        self.kind = kind
+        self.box = box
+        self.item = item
+        self.name = name
+        self.depth = depth
+
+
+class SpatialIndex:
+    """
+    Uniform grid over the boxes of the drawn elements of a laid out unit: its frames and panels, their DLOs and
+    their size labels, with leader lines and texts. Mirrored units are indexed as they are drawn.
+
+    Elements are kept in drawing order, queries return them in that order,
+    so the elements in a viewport can be drawn straight from a query.
+    The grid has about one cell per element, every element is listed in each cell its box reaches into.
+    Muntins always stay inside their panel's outline, the panel's box stands for them.
+    """
+    MIN_CELL_SIZE = 1.0
+
+    def __init__(self, elements: List[IndexedElement]):
+        self.elements = elements
+        self.cells = defaultdict(list)
+
+        self.bounds = self.union_box(*[_.box for _ in elements]) if elements else (0, 0, 0, 0)
+        area = (self.bounds[2] - self.bounds[0]) * (self.bounds[3] - self.bounds[1])
+        self.cell_size = max(self.MIN_CELL_SIZE, math.sqrt(area / max(1, len(elements))))
+
+        for index, element in enumerate(elements):
+            for cell in self._cells(element.box):
+                self.cells[cell].append(index)
+
+    @classmethod
+    def of_panel(cls, root_panel: 'Panel', reflection: Reflection = None) -> 'SpatialIndex':
+        """Index of a laid out panel tree, the size labels as placed on the root frame"""
+        elements = []
+
+        def add(panel, parent_x, parent_y, depth):
+            x, y = parent_x + panel.x, parent_y + panel.y
+            name = cls.name_of(panel)
+
+            box = (x, y, x + panel.scaled_width, y + panel.scaled_height)
+            elements.append(IndexedElement(panel.panel_type, cls.mirrored(box, reflection), panel, name, depth))
+
+            if panel.panel_type == 'panel':
+                dlo_x = x + (panel.scaled_width - panel.scaled_dlo_width) / 2
+                dlo_y = y + (panel.scaled_height - panel.scaled_dlo_height) / 2
+                dlo_box = (dlo_x, dlo_y, dlo_x + panel.scaled_dlo_width, dlo_y + panel.scaled_dlo_height)
+                elements.append(IndexedElement('dlo', cls.mirrored(dlo_box, reflection), panel, name, depth))
+
+            for child_panel in panel.child_panels:
+                add(child_panel, x, y, depth + 1)
+
+        add(root_panel, 0, 0, 0)
+
+        for size_label in root_panel.drawn_size_labels():
+            box = Reflection.move_box(size_label.bounding_box, size_label.reflection_offset(reflection))
+            elements.append(IndexedElement('label', box, size_label, cls.name_of(size_label.panel)))
+
+        return cls(elements)
+
+    @classmethod
+    def of_shape(cls, shape: 'Shape', label_text_size: Optional[float], reflection: Reflection = None):
+        """
+        Index of a planned shape
+        :param label_text_size: size of the drawn labels, None if they are not drawn
+        """
+        elements = []
+
+        def add(planned_shape, depth):
+            outline_box = planned_shape.outline_box
+            name = cls.name_of(planned_shape)
+            kind = 'panel' if planned_shape.parent_shape else 'frame'
+            elements.append(IndexedElement(kind, cls.mirrored(outline_box, reflection), planned_shape, name, depth))
+
+            if label_text_size is not None:
+                offset = reflection.offset(outline_box[0], outline_box[2]) if reflection else 0
+                for label in planned_shape.labels(label_text_size):
+                    box = Reflection.move_box(label.bounding_box, offset)
+                    elements.append(IndexedElement('label', box, label, name))
+
+            for child_shape in planned_shape.child_shapes:
+                add(child_shape, depth + 1)
+
+        add(shape, 0)
+
+        return cls(elements)
+
+    def query(self, box: Tuple[float, float, float, float], kinds: Iterable[str] = None) -> List[IndexedElement]:
+        """
+        Elements whose boxes intersect the (min x, min y, max x, max y) box, in drawing order
+        :param kinds: only elements of these kinds, all of them if None
+        """
+        indexes = set()
+        for cell in self._cells(box):
+            indexes.update(self.cells.get(cell, ()))
+
+        elements = [self.elements[_] for _ in sorted(indexes)]
+
+        return [_ for _ in elements if (kinds is None or _.kind in kinds) and self.boxes_intersect(_.box, box)]
+
+    def hit_test(self, x: float, y: float, kinds: Iterable[str] = None) -> List[IndexedElement]:
+        """Elements at the point, the topmost first: labels, then the innermost panels"""
+        return sorted(reversed(self.query((x, y, x, y), kinds)), key=lambda _: _.kind != 'label')
+
+    def _cells(self, box: Tuple[float, float, float, float]) -> Iterable[Tuple[int, int]]:
+        """Cells of the grid the box reaches into"""
+        if not self.boxes_intersect(box, self.bounds):
+            return []
+
+        columns = self._cell_range(box[0], box[2], self.bounds[0], self.bounds[2])
+        rows = self._cell_range(box[1], box[3], self.bounds[1], self.bounds[3])
+
+        return [(column, row) for column in columns for row in rows]
+
+    def _cell_range(self, start: float, end: float, min_bound: float, max_bound: float) -> range:
+        # unbounded query boxes, e.g. the viewport of a strip, are cut to the indexed elements
+        first = math.floor((max(start, min_bound) - min_bound) / self.cell_size)
+        last = math.floor((min(end, max_bound) - min_bound) / self.cell_size)
+
+        return range(first, last + 1)
+
+    @staticmethod
+    def name_of(item) -> str:
+        """Name of a frame or panel in the spec, frames without one are called 'frame'"""
+        return item.raw_params.get('name') or item.name
+
+    @staticmethod
+    def mirrored(box, reflection: Reflection = None) -> Tuple[float, float, float, float]:
+        return reflection.mirror_box(box) if reflection else box
+
+    @staticmethod
+    def boxes_intersect(box, other_box) -> bool:
+        """Whether two (min x, min y, max x, max y) boxes overlap, any box does with None"""
+        if other_box is None:
+            return True
+
+        return box[0] <= other_box[2] and other_box[0] <= box[2] and box[1] <= other_box[3] and other_box[1] <= box[3]
+
+    @staticmethod
+    def union_box(*boxes) -> Tuple[float, float, float, float]:
+        return (min([_[0] for _ in boxes]), min([_[1] for _ in boxes]),
+                max([_[2] for _ in boxes]), max([_[3] for _ in boxes]))
@@ -1,4 +1,19 @@
+import cairo
+
+
 class Colors:
     WHITE = 255 / 255, 255 / 255, 255 / 255, 1
     BLACK = 0 / 255, 0 / 255, 0 / 255, 1
     LIGHT_GREY = 0 / 255, 0 / 255, 0 / 255, 0.4
+
+    @staticmethod
+    def visible_on(context: cairo.Context, color):
+        """
+        1 bit surfaces round coverage to none or full, translucent colors are drawn opaque on them
+        so the dashed label lines do not vanish
+        """
+        target = context.get_target()
+        if isinstance(target, cairo.ImageSurface) and target.get_format() == cairo.FORMAT_A1:
+            return color[:3] + (1,)
+
+        return color
@@ -0,0 +1,74 @@
+from typing import Dict, Optional, Union
+
+import cairo
+
+
+class QualityPreset:
+    """
+    How much a render spends on fidelity: rasterization settings of the canvas' context,
+    the level of detail thresholds and the png compression level
+    """
+
+    def __init__(self, name: str, antialias: int, tolerance: float, hint_style: int, lod: Union[Dict, bool, None],
+                 png_compression_level: Optional[int]):
+        """
+        :param tolerance: maximum deviation of flattened curves, in pixels
+        :param hint_style: hinting of the label glyphs' outlines, their positions are never hinted
+        :param lod: default `lod` option of the spec, see LevelOfDetail.from_raw_params
+        :param png_compression_level: zlib level, None to leave the encoding to cairo
+        """
+        self.name = name
+        self.antialias = antialias
+        self.tolerance = tolerance
+        self.hint_style = hint_style
+        self.lod = lod
+        self.png_compression_level = png_compression_level
+
+    def apply(self, context: cairo.Context):
+        context.set_antialias(self.antialias)
+        context.set_tolerance(self.tolerance)
+
+        font_options = cairo.FontOptions()
+        font_options.set_antialias(self.antialias)
+        font_options.set_hint_style(self.hint_style)
+        context.set_font_options(font_options)
+
+
+class QualityPresets:
+    """
+    Presets of the `quality` option of a spec:
+        "quality": "draft"      configurator previews, cheap to rasterize and to encode
+        "quality": "standard"   the default
+        "quality": "print"      print resolution elevations, every detail drawn
+    """
+    DRAFT = QualityPreset(
+        name='draft',
+        antialias=cairo.ANTIALIAS_FAST,
+        tolerance=0.5,
+        hint_style=cairo.HINT_STYLE_NONE,
+        lod={'min_detail_size': 2, 'min_arrow_length': 6, 'min_muntin_panel_size': 24, 'min_text_size': 7},
+        png_compression_level=1
+    )
+    STANDARD = QualityPreset(
+        name='standard',
+        antialias=cairo.ANTIALIAS_DEFAULT,
+        tolerance=0.1,
+        hint_style=cairo.HINT_STYLE_DEFAULT,
+        lod=None,
+        png_compression_level=None
+    )
+    PRINT = QualityPreset(
+        name='print',
+        antialias=cairo.ANTIALIAS_BEST,
+        tolerance=0.05,
+        hint_style=cairo.HINT_STYLE_NONE,
+        lod=False,
+        png_compression_level=9
+    )
+
+    PRESETS = {_.name: _ for _ in (DRAFT, STANDARD, PRINT)}
+
+    @classmethod
+    def get(cls, name: Optional[str]) -> QualityPreset:
+        """Unknown names get the standard preset"""
+        return cls.PRESETS.get(name, cls.STANDARD)
@@ -1,14 +1,309 @@
-from bottle import run, request, static_file, post
+import hashlib
+import json
+
+from bottle import run, request, get, post, abort, HTTPResponse
 
 from components.canvas import Canvas
+from components.deadline import Deadline, DeadlineExceeded
+from servers.sendfile_wsgi_server import ThreadingWSGIServer, SendfileRequestHandler
+from services.artifact_store_service import ArtifactStoreService
+from services.cost_estimation_service import CostEstimationService
+from services.json_patch_service import JsonPatchService, JsonPatchError
+from services.memory_cache_service import MemoryCacheService
+from services.region_map_service import RegionMapService
+from services.render_lane_service import RenderLaneService
+from services.single_flight_service import SingleFlightService
+from services.spec_hash_service import SpecHashService
+from services.thumbnail_service import ThumbnailService
+from services.tile_service import TileService, TileOutOfRange
+from services.tiled_rasterization_service import TiledRasterizationService
+
+
+# time budget of a render in seconds, clients can lower or raise it with the X-Render-Timeout header
+DEFAULT_RENDER_TIMEOUT = 30
+MAX_RENDER_TIMEOUT = 120
+
+CONTENT_TYPES = {
+    'svg': 'image/svg+xml',
+    'png': 'image/png',
+}
+
+artifact_store = ArtifactStoreService()
+
+
+def render(raw_params, deadline, key):
+    estimated_cost = CostEstimationService(raw_params).run()
+
+    with RenderLaneService(estimated_cost=estimated_cost, deadline=deadline):
+        canvas = Canvas(raw_params, deadline=deadline)
+        canvas.draw()
+
+    return cache_artifact(key, canvas.filename)
+
+
+def render_thumbnail(raw_params, size, deadline, key):
+    # the pixels of a thumbnail are few, but its spec is still laid out in full
+    estimated_cost = CostEstimationService(raw_params, thumbnail_size=size).run()
+
+    with RenderLaneService(estimated_cost=estimated_cost, deadline=deadline):
+        filename = ThumbnailService(raw_params, size, deadline=deadline).run()
+
+    return cache_artifact(key, filename)
+
+
+def render_tile(raw_params, tile, deadline, key):
+    # a tile is a small part of the png, but its spec is still laid out in full
+    estimated_cost = CostEstimationService(raw_params, tile_size=TileService.TILE_SIZE).run()
+
+    with RenderLaneService(estimated_cost=estimated_cost, deadline=deadline):
+        filename = TileService(raw_params, *tile, deadline=deadline).run()
+
+    return cache_artifact(key, filename)
+
+
+def cache_artifact(key, filename):
+    with open(filename, 'rb') as artifact_file:
+        content = artifact_file.read()
+
+    MemoryCacheService().put(key, content)
+    artifact_store.put(key, content)
+
+    return filename
+
+
+def artifact_etag(spec_hash, image_format):
+    """Deterministic ETag of an artifact: changes with the spec, the format and the engine version"""
+    digest = hashlib.sha256(f"{Canvas.ENGINE_VERSION}/{spec_hash}.{image_format}".encode()).hexdigest()
+
+    return f'"{digest[:32]}"'
+
+
+def request_deadline():
+    """Deadline of the request from its X-Render-Timeout header, at most MAX_RENDER_TIMEOUT seconds"""
+    timeout = request.get_header('X-Render-Timeout')
+    if timeout is None:
+        return Deadline(DEFAULT_RENDER_TIMEOUT)
+
+    try:
+        timeout = float(timeout)
+    except ValueError:
+        timeout = None
+    if timeout is None or not timeout > 0:
+        abort(400, 'X-Render-Timeout must be a positive number of seconds')
+
+    return Deadline(min(timeout, MAX_RENDER_TIMEOUT))
+
+
+def is_not_modified(etag):
+    if_none_match = request.get_header('If-None-Match')
+    if not if_none_match:
+        return False
+
+    etags = [_.strip().replace('W/', '', 1) for _ in if_none_match.split(',')]
+
+    return '*' in etags or etag in etags
+
+
+def artifact_response(spec_hash, image_format, load_raw_params, cache_control, thumbnail_size=None, tile=None):
+    """
+    Answers with 304 if the client already has the artifact, otherwise serves it from the memory tier,
+    from the artifact store or renders it
+    :param load_raw_params: returns the spec, only called if the artifact has to be rendered
+    :param thumbnail_size: serves the thumbnail of the spec instead, a png
+    :param tile: (z, x, y) serves a tile of the deep zoom pyramid of the spec's png instead
+    """
+    if thumbnail_size:
+        variant = f"thumb{thumbnail_size}.png"
+    elif tile:
+        variant = f"tile{'-'.join(str(_) for _ in tile)}.png"
+    else:
+        variant = image_format
+
+    etag = artifact_etag(spec_hash, variant)
+    headers = {
+        'ETag': etag,
+        'Cache-Control': cache_control,
+    }
+    if not thumbnail_size and not tile:
+        headers['Content-Location'] = f"/cad/{spec_hash}.{image_format}"
+        # where the frames and panels are on the image, see region_map
+        headers['Link'] = f'</cad/{spec_hash}.{image_format}.map.json>; rel="describedby"; type="application/json"'
+
+    if is_not_modified(etag):
+        return HTTPResponse(status=304, headers=headers)
+
+    headers['Content-Type'] = CONTENT_TYPES['png' if thumbnail_size or tile else image_format]
+    headers['Content-Disposition'] = f'attachment; filename="{spec_hash}.{variant}"'
+
+    # artifacts are cached under their ETag so a new engine version never serves stale output
+    key = etag.strip('"')
+
+    content = MemoryCacheService().get(key)
+    if content is not None:
+        return HTTPResponse(content, headers={**headers, 'Content-Length': str(len(content))})
+
+    # served with zero-copy sendfile straight from the pack file
+    artifact = artifact_store.get(key)
+    if artifact:
+        return HTTPResponse(artifact, headers={**headers, 'Content-Length': str(artifact.length)})
+
+    raw_params = load_raw_params()
+    deadline = request_deadline()
+
+    if thumbnail_size:
+        render_artifact = lambda: render_thumbnail(raw_params, thumbnail_size, deadline, key)
+    elif tile:
+        render_artifact = lambda: render_tile(raw_params, tile, deadline, key)
+    else:
+        render_artifact = lambda: render(raw_params, deadline, key)
+
+    try:
+        artifact = SingleFlightService(key=key, deadline=deadline).run(render_artifact, lambda: artifact_store.get(key))
+    except DeadlineExceeded:
+        abort(504, 'Render deadline exceeded')
+    except TileOutOfRange as error:
+        abort(404, str(error))
+
+    return HTTPResponse(artifact, headers={**headers, 'Content-Length': str(artifact.length)})
+
+
+def load_spec(spec_hash):
+    """Loads a spec which was rendered before, specs are stored next to the artifacts"""
+    raw_spec = artifact_store.get(f"{spec_hash}.json")
+    if not raw_spec:
+        abort(404, 'Unknown artifact')
+
+    raw_params = json.loads(raw_spec.read())
+    raw_spec.close()
+
+    return raw_params
+
+
+def spec_response(raw_params):
+    """Renders a spec posted by the client, the whole spec or a delta against a previous one"""
+    spec_hash = SpecHashService(raw_params).run()
+    image_format = raw_params.get('image_format', 'svg')
+
+    # keep the spec so the immutable url can re-render the artifact once it is evicted
+    # and later deltas can be applied against it, also when the artifact itself is served from a cache
+    artifact_store.put(f"{spec_hash}.json", json.dumps(raw_params).encode())
+
+    return artifact_response(spec_hash, image_format, lambda: raw_params, cache_control='no-cache')
 
 
 @post('/cad')
 def index():
-    canvas = Canvas(request.json)
-    canvas.draw()
+    return spec_response(request.json)
+
+
+@post('/cad/thumb')
+def thumbnail():
+    """
+    Small png of a posted spec fitting a square of `size` pixels (128, 256 or 512), for catalog and quote lists.
+    Thumbnails have no labels and skip details too small to be seen
+    """
+    size = request.query.get('size', '256')
+    if not size.isdigit() or int(size) not in ThumbnailService.SIZES:
+        abort(400, f"size must be one of {', '.join([str(_) for _ in ThumbnailService.SIZES])}")
+
+    raw_params = request.json
+
+    return artifact_response(SpecHashService(raw_params).run(), 'png', lambda: raw_params,
+                             cache_control='no-cache', thumbnail_size=int(size))
+
+
+@post('/cad/<base_hash:re:[0-9a-f]{64}>/delta')
+def delta(base_hash):
+    """
+    Renders a previous spec with a JSON patch (RFC 6902) applied, e.g. one panel's width changed.
+    Unchanged subtrees reuse their cached layout and drawing, only the changed ones and the labels are redone,
+    as long as the scale stays the same: subtrees are laid out in pixels, so a delta changing the scale fitted
+    into max_canvas_width/max_canvas_height, e.g. a new overall width, lays the whole spec out again.
+    The spec hash of the result is in Content-Location, it is the base of the next delta.
+    """
+    try:
+        raw_params = JsonPatchService(load_spec(base_hash), request.json).run()
+    except JsonPatchError as error:
+        abort(422, str(error))
+
+    return spec_response(raw_params)
+
+
+@get('/cad/<spec_hash:re:[0-9a-f]{64}>.<image_format:re:svg|png>')
+def artifact(spec_hash, image_format):
+    def load_raw_params():
+        raw_params = load_spec(spec_hash)
+        raw_params['image_format'] = image_format
+
+        return raw_params
+
+    return artifact_response(spec_hash, image_format, load_raw_params,
+                             cache_control='public, max-age=31536000, immutable')
+
+
+@get('/cad/<spec_hash:re:[0-9a-f]{64}>.<image_format:re:svg|png>.map.json')
+def region_map(spec_hash, image_format):
+    """
+    Pixel rectangles, and outline polygons of shaped units, of the frames and panels on the spec's image,
+    see RegionMapService. Advertised in the Link header of the image, computed from the cached layout
+    """
+    etag = artifact_etag(spec_hash, f"{image_format}.map.json")
+    headers = {
+        'ETag': etag,
+        'Cache-Control': 'public, max-age=31536000, immutable',
+    }
+
+    if is_not_modified(etag):
+        return HTTPResponse(status=304, headers=headers)
+
+    raw_params = {**load_spec(spec_hash), 'image_format': image_format}
+    deadline = request_deadline()
+    try:
+        content = json.dumps(RegionMapService(Canvas(raw_params, deadline=deadline)).run(),
+                             separators=(',', ':')).encode()
+    except DeadlineExceeded:
+        abort(504, 'Render deadline exceeded')
+
+    return HTTPResponse(content, headers={**headers, 'Content-Type': 'application/json',
+                                          'Content-Length': str(len(content))})
+
+
+@get('/cad/<spec_hash:re:[0-9a-f]{64}>/hit')
+def hit_test(spec_hash):
+    """
+    Frames, panels, DLOs and size labels drawn at the pixel (x, y) of the spec's png, or at the point of its svg,
+    the topmost first. Maps a click to a panel from the cached layout, nothing is rendered
+    """
+    try:
+        x, y = float(request.query['x']), float(request.query['y'])
+    except (KeyError, ValueError):
+        abort(400, 'x and y must be numbers')
+
+    raw_params = load_spec(spec_hash)
+    image_format = request.query.get('image_format', raw_params.get('image_format', 'svg'))
+    if image_format not in CONTENT_TYPES:
+        abort(400, f"image_format must be one of {', '.join(CONTENT_TYPES)}")
+
+    deadline = request_deadline()
+    try:
+        hits = Canvas({**raw_params, 'image_format': image_format}, deadline=deadline).hit_test(x, y)
+    except DeadlineExceeded:
+        abort(504, 'Render deadline exceeded')
+
+    return {'hits': [{'type': _.kind, 'name': _.name} for _ in hits]}
+
 
-    return static_file(canvas.filename, root='/', download=True)
+@get('/cad/<spec_hash:re:[0-9a-f]{64}>/tiles/<z:int>/<x:int>/<y:int>.png')
+def tile(spec_hash, z, x, y):
+    """
+    256x256 tile of the deep zoom pyramid of a spec's png, rendered on demand and cached per tile.
+    Level 0 fits the whole png in one tile, every level doubles the one below,
+    see TileService for the levels and the tile numbering
+    """
+    return artifact_response(spec_hash, 'png', lambda: {**load_spec(spec_hash), 'image_format': 'png'},
+                             cache_control='public, max-age=31536000, immutable', tile=(z, x, y))
 
 
-run(host='0.0.0.0', port=5002)
+# forked before the server starts its threads
+TiledRasterizationService.start_pool()
+run(host='0.0.0.0', port=5002, server_class=ThreadingWSGIServer, handler_class=SendfileRequestHandler)
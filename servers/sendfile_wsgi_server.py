@@ -0,0 +1,80 @@
+import os
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import ServerHandler, WSGIRequestHandler, WSGIServer
+from wsgiref.util import FileWrapper
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    """Handles every request in its own thread, render concurrency is bounded by the render lanes"""
+    daemon_threads = True
+
+
+class SendfileFileWrapper(FileWrapper):
+    """
+    `wsgi.file_wrapper` of the server: responses backed by a real file descriptor
+    (static files and artifacts of the artifact store) are transmitted with zero-copy sendfile
+    """
+
+    @property
+    def span(self):
+        """(offset, count) of the bytes left to send"""
+        if hasattr(self.filelike, 'length'):
+            # ArtifactFile: a slice of a pack file
+            return self.filelike.offset + self.filelike.position, self.filelike.length - self.filelike.position
+
+        offset = self.filelike.tell()
+        return offset, os.fstat(self.filelike.fileno()).st_size - offset
+
+
+class SendfileServerHandler(ServerHandler):
+    wsgi_file_wrapper = SendfileFileWrapper
+
+    def sendfile(self):
+        try:
+            file_descriptor = self.result.filelike.fileno()
+        except (AttributeError, OSError):
+            return False
+
+        offset, count = self.result.span
+
+        if not self.headers_sent:
+            self.send_headers()
+        self._flush()
+
+        socket_descriptor = self.request_handler.connection.fileno()
+        while count > 0:
+            sent = os.sendfile(socket_descriptor, file_descriptor, offset, count)
+            if not sent:
+                break
+
+            offset += sent
+            count -= sent
+            self.bytes_sent += sent
+
+        return True
+
+
+class SendfileRequestHandler(WSGIRequestHandler):
+    def address_string(self):
+        # prevent reverse DNS lookups
+        return self.client_address[0]
+
+    def handle(self):
+        """Same as WSGIRequestHandler.handle but runs the app with SendfileServerHandler"""
+        self.raw_requestline = self.rfile.readline(65537)
+        if len(self.raw_requestline) > 65536:
+            self.requestline = ''
+            self.request_version = ''
+            self.command = ''
+            self.send_error(414)
+            return
+
+        if not self.parse_request():
+            return
+
+        handler = SendfileServerHandler(
+            self.rfile, self.wfile, self.get_stderr(), self.get_environ(),
+            multithread=True,
+        )
+        handler.request_handler = self
+        handler.run(self.server.get_app())
@@ -0,0 +1,299 @@
+import fcntl
+import hashlib
+import logging
+import math
+import mmap
+import os
+import struct
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ArtifactFile:
+    """
+    Read-only slice of a pack file holding one artifact.
+    Exposes `fileno`, `offset` and `length` so the server can transmit it with sendfile
+    """
+
+    def __init__(self, file, offset: int, length: int):
+        self.file = file
+        self.offset = offset
+        self.length = length
+        self.position = 0
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def read(self, size=-1) -> bytes:
+        remaining = self.length - self.position
+        size = remaining if size is None or size < 0 else min(size, remaining)
+
+        data = os.pread(self.fileno(), size, self.offset + self.position)
+        self.position += len(data)
+
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+class ArtifactStoreService:
+    """
+    Persistent content addressed store of rendered artifacts, shared by all worker processes of a host.
+
+    Artifacts are appended to pack files (packs/<id>.pack) instead of being written as millions of tiny files.
+    The index is a fixed size open addressing hash table in a single file which every worker mmaps;
+    writers serialize on an exclusive flock, readers take a shared one.
+
+    Eviction runs whenever a pack is full: packs which only hold artifacts older than the TTL and
+    the oldest packs above the size budget are deleted and the index slots of their artifacts are tombstoned,
+    found through the list of key digests kept next to every pack (packs/<id>.keys), so eviction only touches
+    the slots it frees and lookups still probe past them.
+    When the probe sequence of a new artifact is full, slots of expired or evicted artifacts on it are reused,
+    failing that the oldest packs are evicted until one frees up.
+    """
+    DIRECTORY = '/var/cache/cad_renderer/artifacts'
+
+    PACK_SIZE = 64 * 1024 ** 2
+    MAX_SIZE = 4 * 1024 ** 3
+    TTL = 30 * 24 * 60 * 60
+
+    # specs, svgs and tiles are a few KB: the table has room for twice as many of them as fit in MAX_SIZE,
+    # its file is sparse until slots are written
+    MIN_ARTIFACT_SIZE = 4 * 1024
+    SLOT_COUNT = 2 ** math.ceil(math.log2(2 * MAX_SIZE / MIN_ARTIFACT_SIZE))
+    MAX_PROBES = 64
+
+    # puts which found no slot, in this process
+    failed_puts = 0
+
+    MAGIC = b'CADIDX02'
+    HEADER = struct.Struct('<8sQ')  # magic, id of the pack artifacts are appended to
+    SLOT = struct.Struct('<16sIIQQd')  # key digest, state, pack id, offset, length, stored at
+
+    EMPTY, USED, DELETED = 0, 1, 2
+    DIGEST_SIZE = 16
+
+    def __init__(self, directory: str = None):
+        self.directory = directory or self.DIRECTORY
+        self._index = None
+
+    @property
+    def pack_directory(self):
+        return os.path.join(self.directory, 'packs')
+
+    @property
+    def index_filename(self):
+        return os.path.join(self.directory, 'index')
+
+    @property
+    def lock_filename(self):
+        return os.path.join(self.directory, 'lock')
+
+    @property
+    def index_size(self):
+        return self.HEADER.size + self.SLOT_COUNT * self.SLOT.size
+
+    @property
+    def index(self) -> mmap.mmap:
+        if self._index is None:
+            os.makedirs(self.pack_directory, exist_ok=True)
+
+            with self._locked(fcntl.LOCK_EX):
+                file_descriptor = os.open(self.index_filename, os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    if os.fstat(file_descriptor).st_size != self.index_size or \
+                            os.pread(file_descriptor, len(self.MAGIC), 0) != self.MAGIC:
+                        # new or incompatible index: start with an empty (sparse) table
+                        os.ftruncate(file_descriptor, 0)
+                        os.ftruncate(file_descriptor, self.index_size)
+                        os.pwrite(file_descriptor, self.HEADER.pack(self.MAGIC, self._last_pack_id() + 1), 0)
+
+                    self._index = mmap.mmap(file_descriptor, self.index_size)
+                finally:
+                    os.close(file_descriptor)
+
+        return self._index
+
+    def get(self, key: str) -> Optional[ArtifactFile]:
+        digest = self._digest(key)
+        self._open()
+
+        with self._locked(fcntl.LOCK_SH):
+            slot = self._find(digest)
+            if slot is None:
+                return None
+
+            _, _, pack_id, offset, length, stored_at = self._read_slot(slot)
+            if time.time() - stored_at > self.TTL:
+                return None
+
+            try:
+                pack_file = open(self._pack_filename(pack_id), 'rb')
+            except FileNotFoundError:
+                return None
+
+        return ArtifactFile(pack_file, offset, length)
+
+    def put(self, key: str, content: bytes) -> bool:
+        """
+        :return: False if the artifact could not be stored because its probe sequence is full
+        """
+        digest = self._digest(key)
+        self._open()
+
+        with self._locked(fcntl.LOCK_EX):
+            slot = self._find(digest)
+            if slot is not None and time.time() - self._read_slot(slot)[5] <= self.TTL:
+                # artifacts are content addressed, so a fresh copy is already stored
+                return True
+
+            slot = slot if slot is not None else self._find_free(digest)
+            if slot is None:
+                slot = self._reclaim(digest)
+            if slot is None:
+                ArtifactStoreService.failed_puts += 1
+                logger.warning("Artifact %s not stored, its index slots are full (%d failed puts)",
+                               key, ArtifactStoreService.failed_puts)
+                return False
+
+            pack_id = self._current_pack_id()
+            with open(self._pack_filename(pack_id), 'ab') as pack_file:
+                offset = pack_file.tell()
+                pack_file.write(content)
+            with open(self._keys_filename(pack_id), 'ab') as keys_file:
+                keys_file.write(digest)
+
+            self._write_slot(slot, digest, pack_id, offset, len(content), time.time())
+
+            if offset + len(content) >= self.PACK_SIZE:
+                self.index[:self.HEADER.size] = self.HEADER.pack(self.MAGIC, pack_id + 1)
+                self._evict()
+
+        return True
+
+    def _open(self):
+        """Maps the index before any lock is taken, mapping it takes the exclusive lock itself"""
+        return self.index
+
+    def _evict(self):
+        """Must be called with the exclusive lock held"""
+        current_pack_id = self._current_pack_id()
+        pack_ids = sorted(self._pack_ids())
+        sizes = {_: os.path.getsize(self._pack_filename(_)) for _ in pack_ids}
+        total_size = sum(sizes.values())
+
+        for pack_id in pack_ids:
+            if pack_id == current_pack_id:
+                continue
+
+            # a pack's mtime is the time its newest artifact was appended
+            is_expired = time.time() - os.path.getmtime(self._pack_filename(pack_id)) > self.TTL
+            if is_expired or total_size > self.MAX_SIZE:
+                self._remove_pack(pack_id)
+                total_size -= sizes[pack_id]
+
+    def _reclaim(self, digest: bytes) -> Optional[int]:
+        """
+        Slot for an artifact whose probe sequence is full, must be called with the exclusive lock held
+        :return: None if evicting every pack but the current one did not free one
+        """
+        while True:
+            pack_ids = set(self._pack_ids())
+            for slot in self._probe(digest):
+                _, _, pack_id, _, _, stored_at = self._read_slot(slot)
+                if time.time() - stored_at > self.TTL or pack_id not in pack_ids:
+                    return slot
+
+            evictable_pack_ids = sorted(pack_ids - {self._current_pack_id()})
+            if not evictable_pack_ids:
+                return None
+
+            self._remove_pack(evictable_pack_ids[0])
+
+            slot = self._find_free(digest)
+            if slot is not None:
+                return slot
+
+    def _remove_pack(self, pack_id: int):
+        """Deletes a pack and tombstones the slots of its artifacts, must be called with the exclusive lock held"""
+        try:
+            with open(self._keys_filename(pack_id), 'rb') as keys_file:
+                digests = keys_file.read()
+        except FileNotFoundError:
+            digests = b''
+
+        for start in range(0, len(digests) - self.DIGEST_SIZE + 1, self.DIGEST_SIZE):
+            slot = self._find(digests[start:start + self.DIGEST_SIZE])
+            # the artifact may have been stored again in a newer pack since
+            if slot is not None and self._read_slot(slot)[2] == pack_id:
+                self._tombstone_slot(slot)
+
+        os.remove(self._pack_filename(pack_id))
+        if os.path.exists(self._keys_filename(pack_id)):
+            os.remove(self._keys_filename(pack_id))
+
+    def _probe(self, digest: bytes):
+        start = int.from_bytes(digest[:8], 'little') % self.SLOT_COUNT
+
+        return ((start + _) % self.SLOT_COUNT for _ in range(self.MAX_PROBES))
+
+    def _find(self, digest: bytes) -> Optional[int]:
+        for slot in self._probe(digest):
+            slot_digest, state = self._read_slot(slot)[:2]
+            if state == self.EMPTY:
+                return None
+            # tombstones are probed past, the artifact may sit further along
+            if state == self.USED and slot_digest == digest:
+                return slot
+
+        return None
+
+    def _find_free(self, digest: bytes) -> Optional[int]:
+        for slot in self._probe(digest):
+            if self._read_slot(slot)[1] != self.USED:
+                return slot
+
+        return None
+
+    def _read_slot(self, slot: int):
+        return self.SLOT.unpack_from(self.index, self.HEADER.size + slot * self.SLOT.size)
+
+    def _write_slot(self, slot: int, digest: bytes, pack_id: int, offset: int, length: int, stored_at: float):
+        self.SLOT.pack_into(self.index, self.HEADER.size + slot * self.SLOT.size,
+                            digest, self.USED, pack_id, offset, length, stored_at)
+
+    def _tombstone_slot(self, slot: int):
+        self.SLOT.pack_into(self.index, self.HEADER.size + slot * self.SLOT.size, bytes(16), self.DELETED, 0, 0, 0, 0)
+
+    def _current_pack_id(self) -> int:
+        return self.HEADER.unpack_from(self.index)[1]
+
+    def _pack_ids(self):
+        return [int(_.split('.')[0]) for _ in os.listdir(self.pack_directory) if _.endswith('.pack')]
+
+    def _last_pack_id(self) -> int:
+        return max(self._pack_ids(), default=0)
+
+    def _pack_filename(self, pack_id: int) -> str:
+        return os.path.join(self.pack_directory, f"{pack_id:08d}.pack")
+
+    def _keys_filename(self, pack_id: int) -> str:
+        """Key digests of the artifacts appended to the pack, in order"""
+        return os.path.join(self.pack_directory, f"{pack_id:08d}.keys")
+
+    @classmethod
+    def _digest(cls, key: str) -> bytes:
+        return hashlib.blake2b(key.encode(), digest_size=cls.DIGEST_SIZE).digest()
+
+    @contextmanager
+    def _locked(self, operation):
+        with open(self.lock_filename, 'a') as lock_file:
+            fcntl.flock(lock_file, operation)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
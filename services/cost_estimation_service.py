@@ -0,0 +1,179 @@
+from typing import Dict, List, Tuple
+
+
+class CostEstimationService:
+    """
+    Estimates how expensive a raw spec is to render (in milliseconds) before anything is drawn.
+
+    The estimate is a linear model over the features that dominate render time:
+    number of panel/frame nodes, number of size labels (label placement is quadratic
+    because every label is checked against the already placed ones), muntin pattern
+    complexity and the output pixel area for PNG renders.
+    Nothing is laid out: the estimate runs in the request thread, before the render waits for its lane.
+    """
+
+    # coefficients of the linear model: starting values, not fitted yet,
+    # refit them on the production image with `python -m tools.calibrate_cost_model`
+    BASE_COST = 4.0
+    NODE_COST = 0.35
+    LABEL_COST = 0.25
+    LABEL_PAIR_COST = 0.002
+    MUNTIN_COST = 0.15
+    MEGAPIXEL_COST = 18.0
+
+    # number of line/arc segments a muntin pattern keyword contributes
+    MUNTIN_PATTERN_WEIGHTS = {
+        'sunburst': 6,
+        'brittany': 4,
+        'lite': 3,
+        'colonial': 2,
+    }
+    DEFAULT_MUNTIN_PATTERN_WEIGHT = 2
+
+    # allowance for the size label bands along each side of the canvas, instead of placing the labels
+    LABEL_BANDS_SIZE = 120
+
+    def __init__(self, raw_params: Dict, thumbnail_size: int = None, tile_size: int = None):
+        """
+        :param thumbnail_size: estimates the png thumbnail of the spec fitting a square of this many pixels instead
+        :param tile_size: estimates one square png tile of the spec, this many pixels a side, instead
+        """
+        self.raw_params = raw_params
+        self.thumbnail_size = thumbnail_size
+        self.tile_size = tile_size
+
+    def run(self) -> float:
+        return sum(coefficient * feature for coefficient, feature in zip(self.coefficients(), self.features()))
+
+    @classmethod
+    def coefficients(cls) -> Tuple[float, ...]:
+        return (cls.BASE_COST, cls.NODE_COST, cls.LABEL_COST, cls.LABEL_PAIR_COST, cls.MUNTIN_COST,
+                cls.MEGAPIXEL_COST)
+
+    def features(self) -> Tuple[float, ...]:
+        label_count = self.label_count()
+
+        return 1, self.node_count(), label_count, label_count ** 2, self.muntin_weight(), self.megapixels()
+
+    def node_count(self, raw_panel: Dict = None) -> int:
+        raw_panel = raw_panel or self.raw_params
+        children = (raw_panel.get('frames') or []) + (raw_panel.get('panels') or [])
+
+        return 1 + sum([self.node_count(_) for _ in children])
+
+    def label_count(self) -> int:
+        from components.panel import Panel
+
+        if not self.raw_params.get('draw_label', True) or self.thumbnail_size:
+            return 0
+
+        children = self.raw_params.get('panels') or self.raw_params.get('frames') or []
+
+        if self.raw_params.get('shape'):
+            # shapes label the frame and every panel with a width and a height label
+            return Panel.LABELS_PER_PANEL * (1 + len(children))
+
+        # root frame draws primary labels for itself and its direct children plus dlo labels for child panels
+        dlo_labels = len([_ for _ in children if _['panel_type'] == 'panel']) * Panel.LABELS_PER_PANEL
+        primary_labels = len(children) * Panel.LABELS_PER_PANEL
+
+        return dlo_labels + primary_labels + Panel.LABELS_PER_PANEL
+
+    def muntin_weight(self, raw_panel: Dict = None) -> int:
+        raw_panel = raw_panel or self.raw_params
+        children = (raw_panel.get('frames') or []) + (raw_panel.get('panels') or [])
+
+        weight = sum([self.muntin_weight(_) for _ in children])
+
+        pattern_name = raw_panel.get('muntin_pattern')
+        if pattern_name:
+            keyword_weights = [w for k, w in self.MUNTIN_PATTERN_WEIGHTS.items() if k in pattern_name]
+            weight += sum(keyword_weights) or self.DEFAULT_MUNTIN_PATTERN_WEIGHT
+
+        return weight
+
+    def megapixels(self) -> float:
+        # a tile is drawn from the layout of the whole spec, but only its own pixels are rasterized
+        if self.tile_size:
+            return self.tile_size * self.tile_size / 1_000_000
+
+        # svg output is not rasterized, so the canvas area does not matter
+        if self.raw_params.get('image_format', 'svg') != 'png' and not self.thumbnail_size:
+            return 0
+
+        width, height = self.canvas_size()
+        if self.thumbnail_size:
+            scale = min(1.0, self.thumbnail_size / max(width, height))
+            width, height = width * scale, height * scale
+
+        return width * height / 1_000_000
+
+    def canvas_size(self) -> Tuple[float, float]:
+        """
+        Size of the canvas from the frame's size and scale as Canvas computes it,
+        with a fixed allowance for the label bands instead of the ones of the layout
+        """
+        from components.canvas import Canvas
+
+        bands_size = self.LABEL_BANDS_SIZE if self.label_count() else 0
+        margin_width = bands_size + Canvas.BORDER_LEFT_OFFSET + Canvas.BORDER_RIGHT_OFFSET
+        margin_height = bands_size + Canvas.BORDER_TOP_OFFSET + Canvas.BORDER_BOTTOM_OFFSET
+
+        frame_width = self.raw_params['width']
+        frame_height = max(self.raw_params['height'], self.raw_params.get('height_2', 0))
+
+        scale_factor = self.raw_params.get('scale_factor') or 5
+        max_canvas_width, max_canvas_height = self.raw_params.get('max_canvas_width'), \
+            self.raw_params.get('max_canvas_height')
+        if max_canvas_width or max_canvas_height:
+            fitted_scale_factors = []
+            if max_canvas_width:
+                fitted_scale_factors.append((max_canvas_width - margin_width) / frame_width)
+            if max_canvas_height:
+                fitted_scale_factors.append((max_canvas_height - margin_height) / frame_height)
+
+            scale_factor = max(min(fitted_scale_factors), Canvas.MIN_SCALE_FACTOR)
+
+        return frame_width * scale_factor + margin_width, frame_height * scale_factor + margin_height
+
+    @classmethod
+    def calibrate(cls, benchmarks: List[Tuple[Dict, float]]) -> Tuple[float, ...]:
+        """
+        Fits the model coefficients with least squares.
+
+        :param benchmarks: list of (raw_params, measured render time in milliseconds)
+        :return: coefficients in the same order as `coefficients`
+        """
+        rows = [cls(raw_params).features() for raw_params, _ in benchmarks]
+        timings = [elapsed for _, elapsed in benchmarks]
+        size = len(cls.coefficients())
+
+        # normal equations: (X^T X) b = X^T y
+        matrix = [[sum(row[i] * row[j] for row in rows) for j in range(size)] for i in range(size)]
+        vector = [sum(row[i] * elapsed for row, elapsed in zip(rows, timings)) for i in range(size)]
+
+        return tuple(cls.__solve(matrix, vector))
+
+    @staticmethod
+    def __solve(matrix: List[List[float]], vector: List[float]) -> List[float]:
+        """Gaussian elimination with partial pivoting; singular columns resolve to 0"""
+        size = len(vector)
+        augmented = [row[:] + [value] for row, value in zip(matrix, vector)]
+
+        for column in range(size):
+            pivot = max(range(column, size), key=lambda _: abs(augmented[_][column]))
+            augmented[column], augmented[pivot] = augmented[pivot], augmented[column]
+
+            if abs(augmented[column][column]) < 1e-12:
+                continue
+
+            for row in range(size):
+                if row != column:
+                    factor = augmented[row][column] / augmented[column][column]
+                    augmented[row] = [a - factor * b for a, b in zip(augmented[row], augmented[column])]
+
+        return [
+            augmented[_][size] / augmented[_][_] if abs(augmented[_][_]) >= 1e-12 else 0.0
+            for _ in range(size)
+        ]
+
@@ -0,0 +1,69 @@
+import threading
+from collections import OrderedDict
+from functools import cached_property
+from typing import TYPE_CHECKING, Dict, Optional, Union
+
+from services.spec_hash_service import SpecHashService
+
+if TYPE_CHECKING:
+    from components.panel import Panel
+    from components.shapes.shape import Shape
+
+
+class GeometryCacheService:
+    """
+    Process local LRU cache of laid out panel trees: normalized dimensions, positions,
+    orientation and placed size labels. Also holds the planned trees of shaped units.
+
+    The key only covers the parts of a spec which affect the geometry, so the svg and png renders
+    of a window, its transparent variant and its variant without the label bands share one layout
+    and only redo the drawing and the encoding.
+    Trees are laid out at the origin, the canvas translates them to where the label bands end.
+    Renders at the same scale share a tree, whether the scale is given or fit into a max canvas size.
+    """
+    MAX_ENTRIES = 256
+
+    # keys which only change the drawing/encoding or the canvas around the frame,
+    # mirrored variants are drawn from the same layout and the scale is part of the key on its own
+    EXCLUDED_KEYS = ('image_format', 'is_transparent', 'draw_label', 'lod', 'quality', 'raster_mode', 'direction',
+                     'elevation', 'scale_factor', 'max_canvas_width', 'max_canvas_height')
+
+    _lock = threading.Lock()
+    _layouts = OrderedDict()
+
+    def __init__(self, raw_params: Dict, scale_factor: float):
+        """
+        :param scale_factor: scale the tree is laid out at, given by the spec or fit into its max canvas size
+        """
+        self.raw_params = raw_params
+        self.scale_factor = scale_factor
+
+    @cached_property
+    def key(self) -> str:
+        key = SpecHashService(self.raw_params, excluded_keys=self.EXCLUDED_KEYS).run()
+
+        return f"{key}@{self.scale_factor}"
+
+    def get(self) -> Optional[Union['Panel', 'Shape']]:
+        with self._lock:
+            root_panel = self._layouts.get(self.key)
+            if root_panel is not None:
+                self._layouts.move_to_end(self.key)
+
+            return root_panel
+
+    def put(self, root_panel: Union['Panel', 'Shape']):
+        """
+        :param root_panel: laid out tree, it must not be mutated once cached since renders share it
+        """
+        with self._lock:
+            self._layouts[self.key] = root_panel
+            self._layouts.move_to_end(self.key)
+
+            while len(self._layouts) > self.MAX_ENTRIES:
+                self._layouts.popitem(last=False)
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._layouts.clear()
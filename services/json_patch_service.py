@@ -0,0 +1,168 @@
+from copy import deepcopy
+from typing import Dict, List
+
+
+class JsonPatchError(Exception):
+    pass
+
+
+class JsonPatchService:
+    """
+    Applies a JSON patch (RFC 6902) to a raw spec and returns the patched copy, the given spec is not changed.
+    The patched copy must still be a spec: an object with the members every shape reads.
+
+    Example:
+        JsonPatchService(raw_params, [{"op": "replace", "path": "/panels/0/width", "value": 36}]).run()
+    """
+    OPERATIONS = ('add', 'remove', 'replace', 'move', 'copy', 'test')
+    REQUIRED_MEMBERS = ('panel_type', 'width', 'height', 'dlo_width', 'dlo_height')
+
+    def __init__(self, raw_params: Dict, operations: List[Dict]):
+        self.raw_params = raw_params
+        self.operations = operations
+
+    def run(self) -> Dict:
+        if not isinstance(self.operations, list):
+            raise JsonPatchError('A patch must be a list of operations')
+
+        document = deepcopy(self.raw_params)
+        for operation in self.operations:
+            document = self._apply(document, operation)
+        self._validate(document)
+
+        return document
+
+    def _apply(self, document, operation: Dict):
+        op = operation.get('op') if isinstance(operation, dict) else None
+        if op not in self.OPERATIONS:
+            raise JsonPatchError(f"Unknown operation: {op}")
+
+        path = self._required(operation, 'path')
+
+        if op == 'add':
+            return self._add(document, path, deepcopy(self._required(operation, 'value')))
+        elif op == 'remove':
+            return self._remove(document, path)
+        elif op == 'replace':
+            # replacing the whole spec is adding it, there is nothing to remove first
+            if self._tokens(path):
+                document = self._remove(document, path)
+            return self._add(document, path, deepcopy(self._required(operation, 'value')))
+        elif op == 'move':
+            from_path = self._required(operation, 'from')
+            if path.startswith(f"{from_path}/"):
+                raise JsonPatchError(f"Cannot move {from_path} into its own child {path}")
+
+            value = self._get(document, from_path)
+            document = self._remove(document, from_path)
+            return self._add(document, path, value)
+        elif op == 'copy':
+            value = deepcopy(self._get(document, self._required(operation, 'from')))
+            return self._add(document, path, value)
+        elif op == 'test':
+            if not self._equal(self._get(document, path), self._required(operation, 'value')):
+                raise JsonPatchError(f"Test failed at {path}")
+            return document
+
+    def _validate(self, document):
+        if not isinstance(document, dict):
+            raise JsonPatchError('The patched spec must be an object')
+
+        missing = [_ for _ in self.REQUIRED_MEMBERS if _ not in document]
+        if missing:
+            raise JsonPatchError(f"The patched spec is missing {', '.join(missing)}")
+
+    @classmethod
+    def _equal(cls, a, b) -> bool:
+        """JSON equality: unlike python's, true, 1 and 1.0 are different values"""
+        if type(a) is not type(b):
+            return False
+        if isinstance(a, dict):
+            return a.keys() == b.keys() and all(cls._equal(a[_], b[_]) for _ in a)
+        if isinstance(a, list):
+            return len(a) == len(b) and all(cls._equal(*_) for _ in zip(a, b))
+
+        return a == b
+
+    def _get(self, document, path: str):
+        for token in self._tokens(path):
+            document = self._child(document, token, path)
+
+        return document
+
+    def _add(self, document, path: str, value):
+        tokens = self._tokens(path)
+        if not tokens:
+            return value
+
+        parent = self._get(document, self._parent_path(path))
+        token = tokens[-1]
+
+        if isinstance(parent, dict):
+            parent[token] = value
+        elif isinstance(parent, list):
+            index = len(parent) if token == '-' else self._index(parent, token, path, allow_end=True)
+            parent.insert(index, value)
+        else:
+            raise JsonPatchError(f"Cannot add to a scalar at {path}")
+
+        return document
+
+    def _remove(self, document, path: str):
+        tokens = self._tokens(path)
+        if not tokens:
+            raise JsonPatchError('Cannot remove the whole spec')
+
+        parent = self._get(document, self._parent_path(path))
+        token = tokens[-1]
+
+        if isinstance(parent, dict):
+            if token not in parent:
+                raise JsonPatchError(f"Nothing to remove at {path}")
+            del parent[token]
+        elif isinstance(parent, list):
+            del parent[self._index(parent, token, path)]
+        else:
+            raise JsonPatchError(f"Cannot remove from a scalar at {path}")
+
+        return document
+
+    def _child(self, document, token: str, path: str):
+        if isinstance(document, dict):
+            if token not in document:
+                raise JsonPatchError(f"Path does not exist: {path}")
+            return document[token]
+        elif isinstance(document, list):
+            return document[self._index(document, token, path)]
+
+        raise JsonPatchError(f"Path does not exist: {path}")
+
+    @staticmethod
+    def _index(array: list, token: str, path: str, allow_end=False) -> int:
+        if not token.isdigit() or (token != '0' and token.startswith('0')):
+            raise JsonPatchError(f"Invalid array index at {path}")
+
+        index = int(token)
+        if index > len(array) or (index == len(array) and not allow_end):
+            raise JsonPatchError(f"Array index out of range at {path}")
+
+        return index
+
+    @staticmethod
+    def _tokens(path: str) -> List[str]:
+        """Splits a JSON pointer (RFC 6901) into unescaped reference tokens"""
+        if not isinstance(path, str) or (path and not path.startswith('/')):
+            raise JsonPatchError(f"Invalid path: {path}")
+
+        return [_.replace('~1', '/').replace('~0', '~') for _ in path.split('/')[1:]]
+
+    @staticmethod
+    def _parent_path(path: str) -> str:
+        return path.rsplit('/', 1)[0]
+
+    @staticmethod
+    def _required(operation: Dict, member: str):
+        if member not in operation:
+            raise JsonPatchError(f"Operation {operation.get('op')} requires '{member}'")
+
+        return operation[member]
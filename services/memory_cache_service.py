@@ -0,0 +1,37 @@
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+
+class MemoryCacheService:
+    """
+    Process local LRU cache of rendered artifacts, the tier in front of ArtifactStoreService
+    """
+    MAX_SIZE = 128 * 1024 ** 2
+
+    _lock = threading.Lock()
+    _artifacts = OrderedDict()
+    _size = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            content = self._artifacts.get(key)
+            if content is not None:
+                self._artifacts.move_to_end(key)
+
+            return content
+
+    def put(self, key: str, content: bytes):
+        if len(content) > self.MAX_SIZE:
+            return
+
+        with self._lock:
+            if key in self._artifacts:
+                return
+
+            self._artifacts[key] = content
+            MemoryCacheService._size += len(content)
+
+            while MemoryCacheService._size > self.MAX_SIZE:
+                _, evicted_content = self._artifacts.popitem(last=False)
+                MemoryCacheService._size -= len(evicted_content)
@@ -0,0 +1,165 @@
+import struct
+import sys
+import zlib
+from functools import cached_property
+from typing import Iterable, Iterator, Optional, Tuple
+
+import cairo
+
+
+class PngEncodingService:
+    """
+    Writes an image surface as a png at a chosen zlib compression level, in the smallest fitting color type:
+    - ARGB32, opaque: 8 bit RGB, the alpha bytes are dropped
+    - A8: 8 bit grayscale, ink drawn as alpha on white paper (gray and alpha for transparent canvases)
+    - A1: 1 bit palette of white and black (transparent and black for transparent canvases)
+
+    Pixels are repacked from cairo's native endian words row by row with slice assignments and byte translations,
+    and compressed as they are repacked, so no second copy of the image is held.
+    Transparent ARGB32 surfaces would have to be unpremultiplied pixel by pixel, they are left to cairo's writer,
+    as are opaque ones without a compression level.
+    """
+    SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+    COLOR_TYPE_GRAY = 0
+    COLOR_TYPE_RGB = 2
+    COLOR_TYPE_PALETTE = 3
+    COLOR_TYPE_GRAY_ALPHA = 4
+
+    # no scanline filter, line drawings on a flat background compress well without one
+    FILTER_TYPE_NONE = b'\x00'
+
+    # ink coverage to gray on white paper
+    INVERTED = bytes(255 - _ for _ in range(256))
+    # cairo packs 1 bit pixels starting at the least significant bit on little endian machines, png at the most
+    BIT_REVERSED = bytes(int(f"{_:08b}"[::-1], 2) for _ in range(256))
+
+    def __init__(self, surface: cairo.ImageSurface, filename: str, compression_level: int = None,
+                 is_transparent: bool = False):
+        """
+        :param compression_level: zlib level, None for cairo's writer or zlib's default level
+        """
+        self.surface = surface
+        self.filename = filename
+        self.compression_level = compression_level
+        self.is_transparent = is_transparent
+
+    def run(self):
+        if self.png_format is None:
+            self.surface.write_to_png(self.filename)
+            return
+
+        self.surface.flush()
+        color_type, bit_depth = self.png_format
+        self.write(self.filename, self.surface.get_width(), self.surface.get_height(), color_type, bit_depth,
+                   self.is_transparent, [self.compress(self.rows())])
+
+    @cached_property
+    def png_format(self) -> Optional[Tuple[int, int]]:
+        """(color type, bit depth) of the png, None if it is left to cairo's writer"""
+        return self.png_format_of(self.surface.get_format(), self.compression_level, self.is_transparent)
+
+    @classmethod
+    def png_format_of(cls, surface_format: int, compression_level: Optional[int],
+                      is_transparent: bool) -> Optional[Tuple[int, int]]:
+        if surface_format == cairo.FORMAT_A8:
+            return (cls.COLOR_TYPE_GRAY_ALPHA if is_transparent else cls.COLOR_TYPE_GRAY), 8
+        elif surface_format == cairo.FORMAT_A1:
+            return cls.COLOR_TYPE_PALETTE, 1
+        elif compression_level is None or is_transparent:
+            return None
+
+        return cls.COLOR_TYPE_RGB, 8
+
+    @classmethod
+    def write(cls, filename: str, width: int, height: int, color_type: int, bit_depth: int, is_transparent: bool,
+              image_data: Iterable[bytes]):
+        """
+        :param image_data: pieces of the zlib stream of the scanlines, each is written as an IDAT chunk
+        """
+        header = struct.pack('>IIBBBBB', width, height, bit_depth, color_type, 0, 0, 0)
+
+        with open(filename, 'wb') as png_file:
+            png_file.write(cls.SIGNATURE)
+            png_file.write(cls._chunk(b'IHDR', header))
+
+            if color_type == cls.COLOR_TYPE_PALETTE:
+                if is_transparent:
+                    png_file.write(cls._chunk(b'PLTE', b'\x00\x00\x00' * 2))
+                    png_file.write(cls._chunk(b'tRNS', b'\x00'))
+                else:
+                    png_file.write(cls._chunk(b'PLTE', b'\xff\xff\xff\x00\x00\x00'))
+
+            for data in image_data:
+                if data:
+                    png_file.write(cls._chunk(b'IDAT', data))
+
+            png_file.write(cls._chunk(b'IEND', b''))
+
+    @property
+    def zlib_level(self) -> int:
+        return zlib.Z_DEFAULT_COMPRESSION if self.compression_level is None else self.compression_level
+
+    def compress(self, rows: Iterator[bytes]) -> bytes:
+        compressor = zlib.compressobj(self.zlib_level)
+
+        image_data = [compressor.compress(self.FILTER_TYPE_NONE + _) for _ in rows]
+        image_data.append(compressor.flush())
+
+        return b''.join(image_data)
+
+    def rows(self) -> Iterator[bytes]:
+        """Scanlines of the surface in the png's format, without their filter type"""
+        color_type = (self.png_format or (self.COLOR_TYPE_RGB, 8))[0]
+
+        if color_type == self.COLOR_TYPE_PALETTE:
+            return self._palette_rows()
+        elif color_type in [self.COLOR_TYPE_GRAY, self.COLOR_TYPE_GRAY_ALPHA]:
+            return self._gray_rows()
+
+        return self._rgb_rows()
+
+    def _surface_rows(self, row_length: int) -> Iterator[bytes]:
+        """Rows of the surface's data without the stride's padding"""
+        data, stride = self.surface.get_data(), self.surface.get_stride()
+
+        for y in range(self.surface.get_height()):
+            yield bytes(data[y * stride:y * stride + row_length])
+
+    def _rgb_rows(self) -> Iterator[bytes]:
+        width = self.surface.get_width()
+        # byte offsets of red, green and blue in a pixel's 32 bit word
+        red, green, blue = (2, 1, 0) if sys.byteorder == 'little' else (1, 2, 3)
+
+        for row in self._surface_rows(width * 4):
+            rgb_row = bytearray(width * 3)
+            rgb_row[0::3] = row[red::4]
+            rgb_row[1::3] = row[green::4]
+            rgb_row[2::3] = row[blue::4]
+
+            yield bytes(rgb_row)
+
+    def _gray_rows(self) -> Iterator[bytes]:
+        width = self.surface.get_width()
+
+        for row in self._surface_rows(width):
+            if not self.is_transparent:
+                yield row.translate(self.INVERTED)
+                continue
+
+            # black ink, the coverage is the alpha
+            gray_alpha_row = bytearray(width * 2)
+            gray_alpha_row[1::2] = row
+
+            yield bytes(gray_alpha_row)
+
+    def _palette_rows(self) -> Iterator[bytes]:
+        row_length = (self.surface.get_width() + 7) // 8
+
+        for row in self._surface_rows(row_length):
+            # the set bits are ink, palette entry 1
+            yield row.translate(self.BIT_REVERSED) if sys.byteorder == 'little' else row
+
+    @staticmethod
+    def _chunk(chunk_type: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + chunk_type + data + struct.pack('>I', zlib.crc32(chunk_type + data))
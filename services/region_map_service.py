@@ -0,0 +1,63 @@
+import math
+from typing import Dict, List
+
+from components.canvas import Canvas
+
+
+class RegionMapService:
+    """
+    Map of the frames and panels of a spec to where they are on its rendered image, so a front end can select
+    and highlight them against the image it already has instead of rendering it again:
+        {
+            "width": 1310, "height": 370,
+            "regions": [
+                {"name": "A", "type": "panel", "depth": 2, "rect": [x, y, width, height]},
+                {"name": "A", "type": "panel", "depth": 2, "rect": [...], "polygon": [[x, y], ...]},
+                ...
+            ]
+        }
+    Pixels of the png, or the user space of the svg, from the top left corner, regions in drawing order:
+    inner ones after the ones they are in. Shaped units also get the polygons of their outlines,
+    arcs flattened into points, in whole pixels.
+    Names are the ones of the spec, frames without one are called 'frame'.
+    """
+
+    def __init__(self, canvas: Canvas):
+        self.canvas = canvas
+
+    def run(self) -> Dict:
+        canvas = self.canvas
+        if canvas.image_format == 'png':
+            width, height = canvas.pixel_size
+        else:
+            width, height = canvas.canvas_width, canvas.canvas_height
+
+        regions = []
+        if canvas.spatial_index is not None:
+            for element in canvas.spatial_index.elements:
+                if element.kind not in ['frame', 'panel']:
+                    continue
+
+                region = {'name': element.name, 'type': element.kind, 'depth': element.depth,
+                          'rect': self._rect(element.box)}
+                if canvas.is_shape:
+                    region['polygon'] = self._polygon(element.item.outline_polygon)
+
+                regions.append(region)
+
+        return {'width': width, 'height': height, 'regions': regions}
+
+    def _rect(self, box) -> List[int]:
+        """Whole pixels covering the box of the laid out tree"""
+        min_x, min_y = self.canvas.image_point(box[0], box[3])
+        max_x, max_y = self.canvas.image_point(box[2], box[1])
+        min_x, min_y, max_x, max_y = math.floor(min_x), math.floor(min_y), math.ceil(max_x), math.ceil(max_y)
+
+        return [min_x, min_y, max_x - min_x, max_y - min_y]
+
+    def _polygon(self, points) -> List[List[int]]:
+        reflection = self.canvas.reflection
+        if reflection:
+            points = [reflection.mirror_point(_) for _ in points]
+
+        return [[round(_) for _ in self.canvas.image_point(*point)] for point in points]
@@ -0,0 +1,46 @@
+import threading
+from functools import cached_property
+
+from components.deadline import Deadline, DeadlineExceeded
+
+
+class RenderLaneService:
+    """
+    Routes a render into the interactive or the bulk lane depending on its estimated cost.
+    Every lane has its own worker budget, so huge jobs queue behind each other
+    and never take the slots of small interactive previews.
+
+    Usage:
+        with RenderLaneService(estimated_cost=...):
+            canvas.draw()
+    """
+    INTERACTIVE = 'interactive'
+    BULK = 'bulk'
+
+    # renders estimated above this cost (in milliseconds) go to the bulk lane
+    BULK_COST_THRESHOLD = 250
+
+    WORKER_BUDGETS = {
+        INTERACTIVE: 8,
+        BULK: 2,
+    }
+
+    _semaphores = {lane: threading.BoundedSemaphore(budget) for lane, budget in WORKER_BUDGETS.items()}
+
+    def __init__(self, estimated_cost: float, deadline: Deadline = None):
+        self.estimated_cost = estimated_cost
+        self.deadline = deadline or Deadline()
+
+    @cached_property
+    def lane(self):
+        return self.BULK if self.estimated_cost > self.BULK_COST_THRESHOLD else self.INTERACTIVE
+
+    def __enter__(self):
+        # give up waiting for a free worker once the request's deadline is spent
+        if not self._semaphores[self.lane].acquire(timeout=self.deadline.remaining):
+            raise DeadlineExceeded
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._semaphores[self.lane].release()
@@ -0,0 +1,159 @@
+import fcntl
+import hashlib
+import os
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+from components.deadline import Deadline, DeadlineExceeded
+from services.artifact_store_service import ArtifactFile
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.filename = None
+        self.error = None
+        # requests of the flight which have yet to open the output, the leader included
+        self.pending_readers = 1
+
+
+class SingleFlightService:
+    """
+    Coalesces identical concurrent renders: the first request renders and concurrent
+    duplicates wait for it and share its output file.
+
+    Threads of one worker wait on an in-process event and open the leader's output, which is deleted
+    once every request of the flight has it open. Other worker processes of the host wait on an exclusive
+    lock and then look the artifact up where the leader stored it.
+    Lock files are shared by the keys hashing to the same one of LOCK_FILES, so they never pile up.
+
+    A leader running out of its own deadline doesn't fail its followers: one of them takes over with its own.
+    """
+    DIRECTORY = '/tmp/cad_renderer/single_flight'
+    LOCK_FILES = 256
+    # flock can't time out, a worker waiting on another one polls the lock this often
+    LOCK_POLL_INTERVAL = 0.05
+
+    _lock = threading.Lock()
+    _in_flight = {}
+
+    def __init__(self, key: str, deadline: Deadline = None):
+        """
+        :param key: canonical spec hash plus image format, e.g. <hash>.png
+        :param deadline: time budget for waiting on the leader of the flight
+        """
+        self.key = key
+        self.deadline = deadline or Deadline()
+
+    @property
+    def lock_filename(self):
+        lock_number = int(hashlib.sha256(self.key.encode()).hexdigest(), 16) % self.LOCK_FILES
+
+        return os.path.join(self.DIRECTORY, f"{lock_number}.lock")
+
+    def run(self, render: Callable[[], str], cached: Callable[[], Optional[ArtifactFile]]) -> ArtifactFile:
+        """
+        :param render: renders the spec, stores the artifact and returns the name of the written file
+        :param cached: the stored artifact, None if it is not stored
+        :return: the artifact, open for reading
+        """
+        while True:
+            with self._lock:
+                flight = self._in_flight.get(self.key)
+                is_leader = flight is None
+                if is_leader:
+                    flight = self._in_flight[self.key] = _Flight()
+                else:
+                    flight.pending_readers += 1
+
+            if is_leader:
+                return self._lead(flight, render, cached)
+
+            try:
+                if not flight.done.wait(timeout=self.deadline.remaining):
+                    raise DeadlineExceeded
+
+                if flight.error is None:
+                    # the leader's output, or the artifact another worker stored for it
+                    artifact = self._open(flight.filename) if flight.filename else cached()
+                    if artifact:
+                        return artifact
+            finally:
+                self._release(flight)
+
+            if flight.error and not isinstance(flight.error, DeadlineExceeded):
+                raise flight.error
+
+            # the leader ran out of its own time budget, this request may still have some left
+            self.deadline.check()
+
+    def _lead(self, flight: _Flight, render: Callable[[], str],
+              cached: Callable[[], Optional[ArtifactFile]]) -> ArtifactFile:
+        try:
+            artifact, flight.filename = self._run_across_workers(render, cached)
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[self.key]
+            flight.done.set()
+            self._release(flight)
+
+        return artifact
+
+    def _release(self, flight: _Flight):
+        """The request has the output open or gave up on it, the last one to do so deletes it"""
+        with self._lock:
+            flight.pending_readers -= 1
+            is_last = flight.pending_readers == 0
+
+        # open files stay readable once deleted
+        if is_last and flight.filename and os.path.exists(flight.filename):
+            os.remove(flight.filename)
+
+    def _run_across_workers(self, render: Callable[[], str],
+                            cached: Callable[[], Optional[ArtifactFile]]) -> Tuple[ArtifactFile, Optional[str]]:
+        """
+        :return: the artifact and the name of its rendered file, None if another worker stored it
+        """
+        os.makedirs(self.DIRECTORY, exist_ok=True)
+
+        with open(self.lock_filename, 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # another worker renders the same spec right now, or one sharing the lock file,
+                # wait for it and reuse the artifact it stored
+                self._wait_for_lock(lock_file)
+
+                artifact = cached()
+                if artifact:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                    return artifact, None
+
+            try:
+                filename = render()
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+        return self._open(filename), filename
+
+    @staticmethod
+    def _open(filename: str) -> ArtifactFile:
+        return ArtifactFile(open(filename, 'rb'), 0, os.path.getsize(filename))
+
+    def _wait_for_lock(self, lock_file):
+        """Takes the exclusive lock once the other worker releases it, within the deadline"""
+        while True:
+            remaining = self.deadline.remaining
+            if remaining == 0:
+                raise DeadlineExceeded
+
+            time.sleep(self.LOCK_POLL_INTERVAL if remaining is None else min(self.LOCK_POLL_INTERVAL, remaining))
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return
+            except BlockingIOError:
+                pass
@@ -0,0 +1,35 @@
+import hashlib
+import json
+from typing import Dict, Iterable
+
+
+class SpecHashService:
+    """
+    Calculates a canonical hash of a raw spec.
+    Key order and integral floats (24.0 vs 24) do not change the hash and
+    `image_format` is excluded, so every output format of a spec shares one hash
+    """
+    EXCLUDED_KEYS = ('image_format',)
+
+    def __init__(self, raw_params: Dict, excluded_keys: Iterable[str] = EXCLUDED_KEYS):
+        """
+        :param excluded_keys: top level keys which do not take part in the hash
+        """
+        self.raw_params = raw_params
+        self.excluded_keys = excluded_keys
+
+    def run(self) -> str:
+        canonical_params = {k: v for k, v in self.raw_params.items() if k not in self.excluded_keys}
+        payload = json.dumps(self._canonicalize(canonical_params), sort_keys=True, separators=(',', ':'))
+
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _canonicalize(self, value):
+        if isinstance(value, dict):
+            return {k: self._canonicalize(v) for k, v in value.items()}
+        elif isinstance(value, list):
+            return [self._canonicalize(_) for _ in value]
+        elif isinstance(value, float) and value.is_integer():
+            return int(value)
+
+        return value
@@ -0,0 +1,85 @@
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, List, Optional
+
+import cairo
+
+if TYPE_CHECKING:
+    from components.panel import Panel
+
+
+class SubtreeCacheService:
+    """
+    Hash-consing of panel subtrees: identical subtrees of a spec (and of every other spec rendered by the process)
+    share one laid out list of children and one recorded drawing.
+
+    Children are laid out relative to their parent, so a subtree looks the same wherever it is placed;
+    the recorded fragment is replayed at every position instead of walking the subtree again.
+    A recorded fragment holds the drawing operations of every panel of its subtree, so fragments are bounded
+    by the total number of panels they record rather than by their count.
+    """
+    MAX_ENTRIES = 4096
+    MAX_FRAGMENT_PANELS = 16384
+
+    _lock = threading.Lock()
+    _child_panels = OrderedDict()
+    # key -> (recorded fragment, number of panels it records)
+    _fragments = OrderedDict()
+    _fragment_panels = 0
+
+    def __init__(self, key: str):
+        """
+        :param key: subtree key of the panel, see Panel.subtree_key
+        """
+        self.key = key
+
+    def get_child_panels(self) -> Optional[List['Panel']]:
+        return self._get(self._child_panels)
+
+    def put_child_panels(self, child_panels: List['Panel']):
+        self._put(self._child_panels, child_panels)
+
+    def get_fragment(self) -> Optional[cairo.RecordingSurface]:
+        entry = self._get(self._fragments)
+
+        return entry[0] if entry else None
+
+    def put_fragment(self, fragment: cairo.RecordingSurface, panel_count: int):
+        """
+        :param panel_count: panels of the subtree drawn into the fragment, the panel included
+        """
+        with self._lock:
+            previous_entry = self._fragments.pop(self.key, None)
+            if previous_entry:
+                SubtreeCacheService._fragment_panels -= previous_entry[1]
+
+            self._fragments[self.key] = (fragment, panel_count)
+            SubtreeCacheService._fragment_panels += panel_count
+
+            while len(self._fragments) > 1 and (SubtreeCacheService._fragment_panels > self.MAX_FRAGMENT_PANELS or
+                                                len(self._fragments) > self.MAX_ENTRIES):
+                _, (_, evicted_panel_count) = self._fragments.popitem(last=False)
+                SubtreeCacheService._fragment_panels -= evicted_panel_count
+
+    def _get(self, entries: OrderedDict):
+        with self._lock:
+            value = entries.get(self.key)
+            if value is not None:
+                entries.move_to_end(self.key)
+
+            return value
+
+    def _put(self, entries: OrderedDict, value):
+        with self._lock:
+            entries[self.key] = value
+            entries.move_to_end(self.key)
+
+            while len(entries) > self.MAX_ENTRIES:
+                entries.popitem(last=False)
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._child_panels.clear()
+            cls._fragments.clear()
+            SubtreeCacheService._fragment_panels = 0
@@ -0,0 +1,45 @@
+import re
+
+
+class SvgCanonicalizationService:
+    """
+    Rewrites an svg written by cairo into a byte-stable form, so the same spec always produces identical bytes:
+    - ids are renumbered in document order (cairo numbers surfaces with a process wide counter)
+    - numbers in attribute values are written with a fixed precision
+    """
+    PRECISION = 3
+
+    ATTRIBUTE_VALUE_PATTERN = re.compile(r'="([^"]*)"')
+    NUMBER_PATTERN = re.compile(r'-?\d+\.\d+')
+    ID_PATTERN = re.compile(r'\bid="([^"]+)"')
+    REFERENCE_PATTERN = re.compile(r'(\bid="|#)([A-Za-z_][\w.-]*)')
+
+    def __init__(self, filename: str):
+        self.filename = filename
+
+    def run(self):
+        with open(self.filename, encoding='utf-8') as svg_file:
+            svg = svg_file.read()
+
+        svg = self._renumber_ids(svg)
+        svg = self.ATTRIBUTE_VALUE_PATTERN.sub(
+            lambda m: f'="{self.NUMBER_PATTERN.sub(self._format_number, m.group(1))}"', svg
+        )
+
+        with open(self.filename, 'w', encoding='utf-8') as svg_file:
+            svg_file.write(svg)
+
+    def _renumber_ids(self, svg: str) -> str:
+        new_ids = {}
+        for old_id in self.ID_PATTERN.findall(svg):
+            prefix = re.match(r'[A-Za-z_-]*', old_id).group(0) or 'id'
+            new_ids.setdefault(old_id, f"{prefix}{len(new_ids)}")
+
+        return self.REFERENCE_PATTERN.sub(
+            lambda m: f"{m.group(1)}{new_ids.get(m.group(2), m.group(2))}", svg
+        )
+
+    def _format_number(self, match) -> str:
+        number = f"{float(match.group(0)):.{self.PRECISION}f}".rstrip('0').rstrip('.')
+
+        return '0' if number == '-0' else number
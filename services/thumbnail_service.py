@@ -0,0 +1,26 @@
+from typing import Dict
+
+from components.canvas import Canvas
+from components.deadline import Deadline
+
+
+class ThumbnailService:
+    """
+    Renders a png thumbnail of a spec fitting a square of one of the fixed SIZES, for catalog and quote lists.
+
+    The spec is always drawn straight at thumbnail scale: without labels, with details too small to be seen skipped
+    and with fast antialiasing, so a thumbnail is the same whatever else of the spec has been rendered before.
+    Returns the filename of the thumbnail.
+    """
+    SIZES = (128, 256, 512)
+
+    def __init__(self, raw_params: Dict, size: int, deadline: Deadline = None):
+        self.raw_params = raw_params
+        self.size = size
+        self.deadline = deadline or Deadline()
+
+    def run(self) -> str:
+        canvas = Canvas(self.raw_params, deadline=self.deadline, thumbnail_size=self.size)
+        canvas.draw()
+
+        return canvas.filename
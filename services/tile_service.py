@@ -0,0 +1,67 @@
+import math
+import random
+import string
+from typing import Dict
+
+from components.canvas import Canvas
+from components.deadline import Deadline
+from services.png_encoding_service import PngEncodingService
+
+
+class TileOutOfRange(Exception):
+    pass
+
+
+class TileService:
+    """
+    Renders one z/x/y tile of the deep zoom pyramid of a spec's png, for pan and zoom viewers of whole façades.
+
+    Level `max_zoom` is the full size png, every level below it halves the one above, level 0 fits in one tile.
+    Levels above `max_zoom`, up to MAX_OVERZOOM more, keep doubling: the drawing is vector, so they stay sharp.
+    x counts tiles to the right and y downwards from the top left corner of the png.
+
+    A tile is drawn on its own at its level's scale from the cached layout of the spec, only the panels and labels
+    in it are drawn and details too small to be seen at that level are skipped.
+    Returns the filename of the tile.
+    """
+    TILE_SIZE = 256
+    MAX_OVERZOOM = 3
+
+    def __init__(self, raw_params: Dict, z: int, x: int, y: int, deadline: Deadline = None):
+        self.raw_params = raw_params
+        self.z = z
+        self.x = x
+        self.y = y
+        self.deadline = deadline or Deadline()
+
+    def run(self) -> str:
+        canvas = Canvas(self.raw_params, deadline=self.deadline)
+        max_zoom = self.max_zoom(canvas)
+        if not 0 <= self.z <= max_zoom + self.MAX_OVERZOOM:
+            raise TileOutOfRange(f"Zoom levels go up to {max_zoom + self.MAX_OVERZOOM}")
+
+        # the scale is fitted once, the tile's canvas draws from the same layout
+        canvas = canvas.zoomed(2.0 ** (self.z - max_zoom))
+
+        columns, rows = [math.ceil(_ / self.TILE_SIZE) for _ in canvas.pixel_size]
+        if not (0 <= self.x < columns and 0 <= self.y < rows):
+            raise TileOutOfRange(f"Zoom level {self.z} has {columns}x{rows} tiles")
+
+        # tiles at the right and bottom edges are cut to the png
+        x, y = self.x * self.TILE_SIZE, self.y * self.TILE_SIZE
+        width = min(self.TILE_SIZE, canvas.pixel_size[0] - x)
+        height = min(self.TILE_SIZE, canvas.pixel_size[1] - y)
+
+        tile = canvas.rasterize(x, y, width, height)
+
+        filename = f"/tmp/{''.join(random.choice(string.ascii_uppercase) for _ in range(20))}.png"
+        PngEncodingService(tile, filename, canvas.quality.png_compression_level,
+                           is_transparent=canvas.is_transparent).run()
+        tile.finish()
+
+        return filename
+
+    @classmethod
+    def max_zoom(cls, canvas: Canvas) -> int:
+        """Level of the full size png: halving it that many times fits it in one tile"""
+        return max(0, math.ceil(math.log2(max(canvas.canvas_width, canvas.canvas_height) / cls.TILE_SIZE)))
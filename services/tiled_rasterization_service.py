@@ -0,0 +1,140 @@
+import multiprocessing
+import os
+import struct
+import uuid
+import zlib
+from typing import TYPE_CHECKING, Dict, Tuple
+
+from components.deadline import Deadline, DeadlineExceeded
+from services.png_encoding_service import PngEncodingService
+
+if TYPE_CHECKING:
+    from components.canvas import Canvas
+
+
+class TiledRasterizationService:
+    """
+    Rasterizes a very large png in horizontal strips, in a pool of worker processes, and streams them into one png.
+
+    The pool is started once, before the server starts any thread, so the forked workers never inherit a lock
+    held by another thread (cairo's, fontconfig's, the caches'). A strip is sent to the pool as the spec and
+    the strip's rows: a worker lays the spec out once, from then on its geometry cache serves the layout,
+    draws the strip onto a surface of the strip's size, which clips the drawing, with the panels and labels
+    outside of the strip culled, and compresses it. No process ever holds the whole image:
+    - a strip is deflated on its own, all but the last one end on a full flush so their deflate data can be
+      concatenated, the adler-32 checksums of the strips are combined into the one of the whole image
+    - the compressed strips are written as IDAT chunks in order, as they come in
+    Waiting for a strip is bounded by the render's deadline, the workers check it while drawing.
+    """
+    STRIP_HEIGHT = 256
+    MAX_PROCESSES = os.cpu_count() or 1
+
+    # zlib stream header: deflate with a 32K window, default compression
+    ZLIB_HEADER = b'\x78\x9c'
+    ADLER_BASE = 65521
+
+    _pool = None
+
+    # in a worker: the canvas of the render its last strip belonged to
+    _worker_canvas = (None, None)
+
+    def __init__(self, canvas: 'Canvas', filename: str):
+        self.canvas = canvas
+        self.filename = filename
+
+    @classmethod
+    def start_pool(cls, processes: int = MAX_PROCESSES):
+        """Starts the workers, must be called before the process starts any thread"""
+        if cls._pool is None:
+            cls._pool = multiprocessing.get_context('fork').Pool(processes)
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return cls._pool is not None
+
+    def run(self):
+        canvas = self.canvas
+        width, height = canvas.pixel_size
+        strips = [(y, min(self.STRIP_HEIGHT, height - y)) for y in range(0, height, self.STRIP_HEIGHT)]
+
+        # opaque color strips are always repacked to RGB, cairo's writer can't write a strip
+        color_type, bit_depth = PngEncodingService.png_format_of(
+            canvas.raster_format, canvas.quality.png_compression_level, canvas.is_transparent
+        ) or (PngEncodingService.COLOR_TYPE_RGB, 8)
+
+        render_id = uuid.uuid4().hex
+        jobs = [(render_id, canvas.raw_params, canvas.deadline, y, strip_height, y + strip_height == height)
+                for y, strip_height in strips]
+
+        try:
+            compressed_strips = self._pool.imap(self._compress_strip, jobs)
+            PngEncodingService.write(self.filename, width, height, color_type, bit_depth, canvas.is_transparent,
+                                     self._zlib_stream(compressed_strips, len(jobs), canvas.deadline))
+        except Exception:
+            if os.path.exists(self.filename):
+                os.remove(self.filename)
+            raise
+
+    def _zlib_stream(self, compressed_strips, strip_count: int, deadline: Deadline):
+        """Pieces of the zlib stream: its header, the deflate data of the strips and the combined checksum"""
+        yield self.ZLIB_HEADER
+
+        adler = 1
+        for _ in range(strip_count):
+            try:
+                deflate_data, strip_adler, length = compressed_strips.next(timeout=deadline.remaining)
+            except multiprocessing.TimeoutError:
+                raise DeadlineExceeded
+
+            adler = self.adler32_combine(adler, strip_adler, length)
+            yield deflate_data
+
+        yield struct.pack('>I', adler)
+
+    @classmethod
+    def _compress_strip(cls, job: Tuple[str, Dict, Deadline, int, int, bool]) -> Tuple[bytes, int, int]:
+        """
+        Runs in a worker
+        :return: raw deflate data of the strip's scanlines, their adler-32 checksum and length
+        """
+        render_id, raw_params, deadline, y, height, is_last = job
+        canvas = cls._canvas_of(render_id, raw_params, deadline)
+
+        strip = canvas.rasterize(0, y, canvas.pixel_size[0], height)
+        encoder = PngEncodingService(strip, None, canvas.quality.png_compression_level,
+                                     is_transparent=canvas.is_transparent)
+        compressor = zlib.compressobj(encoder.zlib_level, zlib.DEFLATED, -zlib.MAX_WBITS)
+
+        deflate_data, adler, length = [], 1, 0
+        for row in encoder.rows():
+            scanline = PngEncodingService.FILTER_TYPE_NONE + row
+            deflate_data.append(compressor.compress(scanline))
+            adler = zlib.adler32(scanline, adler)
+            length += len(scanline)
+        deflate_data.append(compressor.flush(zlib.Z_FINISH if is_last else zlib.Z_FULL_FLUSH))
+        strip.finish()
+
+        return b''.join(deflate_data), adler, length
+
+    @classmethod
+    def _canvas_of(cls, render_id: str, raw_params: Dict, deadline: Deadline) -> 'Canvas':
+        """Canvas of the render in a worker, the strips of a render mostly follow each other"""
+        from components.canvas import Canvas
+
+        worker_render_id, canvas = cls._worker_canvas
+        if worker_render_id != render_id:
+            canvas = Canvas(raw_params, deadline=deadline)
+            cls._worker_canvas = (render_id, canvas)
+
+        return canvas
+
+    @classmethod
+    def adler32_combine(cls, adler1: int, adler2: int, length2: int) -> int:
+        """Adler-32 of two concatenated pieces from their checksums and the length of the second, as zlib's"""
+        remainder = length2 % cls.ADLER_BASE
+        sum1 = adler1 & 0xffff
+        sum2 = (remainder * sum1) % cls.ADLER_BASE
+        sum1 += (adler2 & 0xffff) + cls.ADLER_BASE - 1
+        sum2 += (adler1 >> 16) + (adler2 >> 16) + cls.ADLER_BASE - remainder
+
+        return (sum1 % cls.ADLER_BASE) | ((sum2 % cls.ADLER_BASE) << 16)
@@ -0,0 +1,68 @@
+import unittest
+from unittest import mock
+
+import cairo
+
+from components.canvas import Canvas
+from components.shapes.shape_label import ShapeLabel
+
+
+def panel(width, height, muntin_pattern):
+    return {'panel_type': 'panel', 'name': 'A', 'width': width, 'height': height,
+            'dlo_width': width - 2, 'dlo_height': height - 2, 'muntin_pattern': muntin_pattern}
+
+
+def frame(shape, width, height, panels, **kwargs):
+    return {'panel_type': 'frame', 'shape': shape, 'width': width, 'height': height,
+            'dlo_width': width - 2, 'dlo_height': height - 2, 'panels': panels, **kwargs}
+
+
+class ShapeReflectionTest(unittest.TestCase):
+    """
+    Interior elevations of the shapes whose muntins are drawn line by line: the reflection has to be undone
+    once the outline is drawn, labels are moved but never mirrored and panels are mirrored exactly once
+    """
+    SPECS = {
+        'arc': frame('arc', 60, 20, [panel(56, 18, 'sunburst')]),
+        'halfcircle': frame('halfcircle', 60, 30, [panel(56, 28, 'lite-4')]),
+        'tombstone': frame('tombstone', 40, 60, [panel(36, 56, '7 lite sunburst')]),
+        'eyebrow': frame('eyebrow', 60, 30, [panel(56, 28, 'lite-4')], height_2=20),
+    }
+
+    def test_interior_elevation(self):
+        for shape_name, raw_params in self.SPECS.items():
+            with self.subTest(shape=shape_name):
+                canvas = Canvas({**raw_params, 'elevation': 'interior', 'image_format': 'png'})
+                self.assertIsNotNone(canvas.reflection)
+
+                context = cairo.Context(cairo.RecordingSurface(cairo.CONTENT_COLOR_ALPHA, None))
+                matrix = context.get_matrix()
+                label_matrices, panel_matrices = [], []
+
+                shape_class = Canvas.SHAPES[shape_name]
+                draw_label, draw_panel = ShapeLabel.draw, shape_class._draw_panel
+
+                def record_label(label, label_context, *args, **kwargs):
+                    label_matrices.append(label_context.get_matrix())
+                    return draw_label(label, label_context, *args, **kwargs)
+
+                def record_panel(shape, panel_context, *args, **kwargs):
+                    panel_matrices.append(panel_context.get_matrix())
+                    return draw_panel(shape, panel_context, *args, **kwargs)
+
+                with mock.patch.object(ShapeLabel, 'draw', record_label), \
+                        mock.patch.object(shape_class, '_draw_panel', record_panel):
+                    canvas.shape.draw(context, draw_label=True, reflection=canvas.reflection)
+
+                self.assertEqual(tuple(context.get_matrix()), tuple(matrix))
+                self.assertTrue(label_matrices)
+                self.assertTrue(all(_.xx > 0 for _ in label_matrices))
+                self.assertTrue(panel_matrices)
+                self.assertTrue(all(_.xx < 0 for _ in panel_matrices))
+
+                # the whole render goes through as well
+                canvas.draw()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+Fits the coefficients of CostEstimationService on cold renders of a benchmark set.
+
+usage:
+    python -m tools.calibrate_cost_model                 renders the built-in benchmark set
+    python -m tools.calibrate_cost_model specs.jsonl     renders the specs of the file, one json spec per line
+
+Every spec is rendered REPEATS times with the geometry, subtree and font caches cleared before each render,
+the median time is taken. Rendered files are deleted. Prints the fitted coefficients, to be pasted into
+CostEstimationService along with the machine and the date they were measured on.
+"""
+import itertools
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from components.canvas import Canvas
+from components.font import Font
+from services.cost_estimation_service import CostEstimationService
+from services.geometry_cache_service import GeometryCacheService
+from services.subtree_cache_service import SubtreeCacheService
+
+REPEATS = 3
+
+COEFFICIENT_NAMES = ['BASE_COST', 'NODE_COST', 'LABEL_COST', 'LABEL_PAIR_COST', 'MUNTIN_COST', 'MEGAPIXEL_COST']
+
+MUNTIN_PATTERNS = [None, 'colonial-2x1', 'colonial-3x2']
+
+
+def benchmark_specs() -> List[Dict]:
+    """Rows of frames of two panels: node count, label count, muntins and png size varied independently"""
+    specs = []
+    for columns, rows, muntin_pattern, image_format, scale_factor in itertools.product(
+            [1, 2, 4, 8], [1, 2, 4], MUNTIN_PATTERNS, ['svg', 'png'], [2, 5]):
+        frames = []
+        for row, column in itertools.product(range(rows), range(columns)):
+            panels = [{'panel_type': 'panel', 'name': name, 'width': 30, 'height': 40, 'dlo_width': 25,
+                       'dlo_height': 35, **({'muntin_pattern': muntin_pattern} if muntin_pattern else {})}
+                      for name in ['A', 'B']]
+            frames.append({'panel_type': 'frame', 'name': f"f{len(frames) + 1}", 'width': 60, 'height': 50,
+                           'dlo_width': 50, 'dlo_height': 40, 'coordinates': {'x': column + 1, 'y': row + 1},
+                           'panels': panels})
+
+        specs.append({'panel_type': 'frame', 'name': 'frame', 'width': 60 * columns, 'height': 50 * rows,
+                      'dlo_width': 60 * columns - 10, 'dlo_height': 50 * rows - 10, 'image_format': image_format,
+                      'scale_factor': scale_factor, 'frames': frames})
+
+    return specs
+
+
+def measure(raw_params: Dict) -> float:
+    """Median time of a cold render of the spec, in milliseconds"""
+    timings = []
+    for _ in range(REPEATS):
+        GeometryCacheService.clear()
+        SubtreeCacheService.clear()
+        Font.clear()
+
+        canvas = Canvas(raw_params)
+        started_at = time.perf_counter()
+        canvas.draw()
+        timings.append((time.perf_counter() - started_at) * 1000)
+
+        if os.path.exists(canvas.filename):
+            os.remove(canvas.filename)
+
+    return statistics.median(timings)
+
+
+def calibrate(specs: List[Dict]) -> Tuple[float, ...]:
+    return CostEstimationService.calibrate([(_, measure(_)) for _ in specs])
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        with open(sys.argv[1]) as specs_file:
+            benchmark = [json.loads(_) for _ in specs_file if _.strip()]
+    else:
+        benchmark = benchmark_specs()
+
+    for name, value in zip(COEFFICIENT_NAMES, calibrate(benchmark)):
+        print(f"{name} = {value:.6g}")